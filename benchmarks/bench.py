@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+Instructions:
+
+.. code-block:: shell
+
+    $ make install
+    $ python benchmarks/bench.py --output bench.json
+    $ python benchmarks/bench.py --compare bench.json
+
+
+Measures:
+
+- ``deep_hash`` on nested dicts, objects, large lists and large buffers.
+- ``Memoize`` hit and miss latency against :mod:`redislite`, with and without the local tier.
+- ``Session.get`` cache hit throughput against a local HTTP server.
+
+Results are JSON: environment metadata and, per benchmark, the best and median seconds per call over several
+repeats.  ``--compare`` prints the ratio to an earlier run and exits non-zero past ``--threshold``.
+"""
+from __future__ import print_function, division
+
+import argparse
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+import timeit
+from itertools import count
+from os import path
+
+from six.moves import BaseHTTPServer
+
+benchmarks = []
+"""``(name, setup)`` pairs.  ``setup(env)`` returns the callable to measure."""
+
+
+def benchmark(name):
+    """Register a benchmark."""
+
+    def decorator(setup):
+        benchmarks.append((name, setup))
+        return setup
+
+    return decorator
+
+
+# HASHING
+# ----------------------------------------------------------------------------
+class Sample(object):
+    def __init__(self, depth):
+        self.name = 'sample-%d' % depth
+        self.size = depth * 1.5
+        self.tags = ['a', 'b', 'c']
+        self.child = Sample(depth - 1) if depth else None
+
+
+def nested_dict(depth, width):
+    if not depth:
+        return 'leaf'
+    return dict(('key-%d' % i, nested_dict(depth - 1, width)) for i in range(width))
+
+
+@benchmark('deep_hash.nested_dict')
+def bench_hash_nested_dict(env):
+    from cache_requests.utils import deep_hash
+
+    obj = nested_dict(depth=3, width=8)
+    return lambda: deep_hash(obj)
+
+
+@benchmark('deep_hash.object')
+def bench_hash_object(env):
+    from cache_requests.utils import deep_hash
+
+    obj = Sample(depth=5)
+    return lambda: deep_hash(obj)
+
+
+@benchmark('deep_hash.large_list')
+def bench_hash_large_list(env):
+    from cache_requests.utils import deep_hash
+
+    obj = list(range(10000))
+    return lambda: deep_hash(obj)
+
+
+@benchmark('deep_hash.large_bytes')
+def bench_hash_large_bytes(env):
+    from cache_requests.utils import deep_hash
+
+    obj = bytearray(8 << 20)
+    return lambda: deep_hash('post', obj)
+
+
+@benchmark('deep_hash.flat_args')
+def bench_hash_flat_args(env):
+    from cache_requests.utils import deep_hash
+
+    return lambda: deep_hash('get', 'http://localhost/search', 42, q='python', page=2)
+
+
+# MEMOIZE
+# ----------------------------------------------------------------------------
+@benchmark('memoize.hit')
+def bench_memoize_hit(env):
+    from cache_requests import Memoize
+
+    @Memoize(connection=env['redis'], ex=3600)
+    def hello(*args, **kwargs):
+        return {'args': args, 'kwargs': kwargs}
+
+    hello('hello', 42, q='python')
+    return lambda: hello('hello', 42, q='python')
+
+
+@benchmark('memoize.hit_local')
+def bench_memoize_hit_local(env):
+    from cache_requests import Memoize, LRUCache
+
+    @Memoize(connection=env['redis'], ex=3600, local_cache=LRUCache())
+    def hello(*args, **kwargs):
+        return {'args': args, 'kwargs': kwargs}
+
+    hello('hello', 42, q='python')
+    return lambda: hello('hello', 42, q='python')
+
+
+@benchmark('memoize.miss')
+def bench_memoize_miss(env):
+    from cache_requests import Memoize
+
+    @Memoize(connection=env['redis'], ex=3600)
+    def hello(*args, **kwargs):
+        return {'args': args, 'kwargs': kwargs}
+
+    counter = count()
+    return lambda: hello('hello', next(counter), q='python')
+
+
+# SESSION
+# ----------------------------------------------------------------------------
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    body = json.dumps({'results': list(range(100))}).encode('utf-8')
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+@benchmark('session.get_hit')
+def bench_session_get_hit(env):
+    from cache_requests import Session
+
+    requests = Session(connection=env['redis'], ex=3600)
+    url = '%s/search?q=python' % env['server_url']
+
+    requests.get(url)
+    return lambda: requests.get(url)
+
+
+# RUNNER
+# ----------------------------------------------------------------------------
+def measure(func, repeat, min_time):
+    """Best and median seconds per call.  Calls per repeat are calibrated to last ``min_time`` seconds."""
+
+    timer = timeit.Timer(func)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+
+    times = sorted(total / number for total in timer.repeat(repeat, number))
+    return {
+        'number': number,
+        'repeat': repeat,
+        'best': times[0],
+        'median': times[len(times) // 2],
+    }
+
+
+def environment():
+    import cache_requests
+
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'cache_requests': cache_requests.__version__,
+    }
+
+
+def compare(results, baseline_file, threshold):
+    """Print the median ratio per benchmark.  Return ``True`` if any benchmark slowed past ``threshold``."""
+
+    with open(baseline_file) as f:
+        baseline = json.load(f)['benchmarks']
+
+    regressed = False
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            continue
+
+        ratio = result['median'] / baseline[name]['median']
+        slower = ratio > threshold
+        regressed = regressed or slower
+        print('%-28s %8.3fx%s' % (name, ratio, '  REGRESSION' if slower else ''), file=sys.stderr)
+
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='cache_requests benchmarks')
+    parser.add_argument('-k', dest='match', default='', help='Only run benchmarks whose name contains MATCH.')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2, help='Seconds per repeat.')
+    parser.add_argument('--output', help='Write JSON results to file.  Defaults to stdout.')
+    parser.add_argument('--compare', help='JSON results of an earlier run.')
+    parser.add_argument('--threshold', type=float, default=1.2, help='Slowdown ratio reported as a regression.')
+    args = parser.parse_args(argv)
+
+    from redislite import StrictRedis
+
+    tmpdir = tempfile.mkdtemp()
+    server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    env = {
+        'redis': StrictRedis(dbfilename=path.join(tmpdir, 'bench.db')),
+        'server_url': 'http://127.0.0.1:%d' % server.server_port,
+    }
+
+    results = {}
+    try:
+        for name, setup in benchmarks:
+            if args.match not in name:
+                continue
+
+            env['redis'].flushdb()
+            results[name] = measure(setup(env), args.repeat, args.min_time)
+            print('%-28s %10.2f us' % (name, results[name]['median'] * 1e6), file=sys.stderr)
+    finally:
+        server.shutdown()
+        env['redis'].shutdown()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    output = json.dumps({'environment': environment(), 'benchmarks': results}, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -13,7 +13,7 @@ from __future__ import absolute_import
 
 import logging
 
-from ._compat import NullHandler
+from ._compat import NullHandler, PY35
 
 logging.getLogger(__name__).addHandler(NullHandler())
 
@@ -21,7 +21,16 @@ __author__ = 'Manu Phatak'
 __email__ = 'bionikspoon@gmail.com'
 __version__ = '4.0.0'
 
+from .cache_control import HTTPCachePolicy
+from .hooks import Hooks
+from .locks import DogpileLock
+from .lru import LRUCache
 from .memoize import Memoize
 from .sessions import Session
 
-__all__ = ['Session', 'Memoize']
+__all__ = ['Session', 'Memoize', 'LRUCache', 'DogpileLock', 'Hooks', 'HTTPCachePolicy']
+
+if PY35:
+    from .aio import AsyncMemoize, AsyncSession
+
+    __all__ += ['AsyncMemoize', 'AsyncSession']
@@ -15,7 +15,8 @@ from sys import version_info
 from six import PY3
 
 PY26 = version_info[0:2] <= (2, 6)
-__all__ = ['NullHandler', 'pickle']
+PY35 = version_info[0:2] >= (3, 5)
+__all__ = ['NullHandler', 'pickle', 'monotonic', 'signature', 'Parameter', 'Mapping', 'SURROGATES', 'byte_view']
 
 if not PY26:
     from logging import NullHandler
@@ -26,6 +27,30 @@ else:  # pragma: no cover
 
 if PY3:
     import pickle
+    from collections.abc import Mapping
+    from inspect import signature, Parameter
+    from time import monotonic
+
+    SURROGATES = 'surrogatepass'
+
+    def byte_view(view):
+        """Flat bytes view of a buffer.  Copies only buffers that can't be cast, e.g. non contiguous ones."""
+        try:
+            return view.cast('B') if view.c_contiguous else memoryview(view.tobytes())
+        except TypeError:  # formats without a byte cast
+            return memoryview(view.tobytes())
 else:  # pragma: no cover
     # noinspection PyPep8Naming
     import cPickle as pickle
+    from collections import Mapping
+    from time import time as monotonic
+
+    Parameter = None
+    SURROGATES = 'strict'  # Encodes lone surrogates as is
+
+    def signature(func):
+        raise ValueError('Signatures require Python 3.')
+
+    def byte_view(view):
+        """Flat bytes view of a buffer.  Python 2 views can't be cast, copies."""
+        return memoryview(view.tobytes())
@@ -0,0 +1,424 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+:mod:`cache_requests.aio`
+~~~~~~~~~~~~~~~~~~~~~~~~~
+
+.. moduleauthor:: Manu Phatak <bionikspoon@gmail.com>
+
+:mod:`asyncio` counterparts of :class:`Memoize` and :class:`Session`.  Python 3.5+.
+
+Cache I/O runs on an executor, off the event loop.  Keys and storage are shared with the blocking classes.
+
+Public Api
+**********
+    * :class:`AsyncMemoize`
+    * :class:`AsyncSession`
+
+Private API
+***********
+    * :class:`AsyncMemoizeRequest`
+
+Source
+******
+"""
+from __future__ import absolute_import
+
+import asyncio
+import logging
+from collections import OrderedDict
+from functools import partial
+from time import time
+
+from ._compat import monotonic
+from .memoize import Memoize, Entry, MISSING, unpack_args
+from .responses import LazyResponse
+from .sessions import MemoizeRequest, Session
+from .utils import make_callback
+
+logger = logging.getLogger(__name__)
+
+__all__ = ['AsyncMemoize', 'AsyncMemoizeRequest', 'AsyncSession']
+
+
+class AsyncMemoize(Memoize):
+    """Decorator class.  Memoize coroutine functions.  Concurrent awaits on the same key share one computation."""
+
+    def __init__(self, func=None, executor=None, **kwargs):
+        """
+        Set options.  Accepts every :class:`Memoize` option.
+
+        :param function func: Coroutine function to be decorated.
+        :param concurrent.futures.Executor executor: Runs cache I/O.  Defaults to the event loop's executor.
+        """
+
+        super(AsyncMemoize, self).__init__(func=func, **kwargs)
+        self.executor = executor
+        self.inflight = {}
+
+    async def __call__(self, *args, **kwargs):
+        """
+        Cache getter setter.
+
+        :param tuple args: Arguments passed to function.
+        :param dict kwargs: Keyword arguments passed to function.
+        :param bool bust_cache: Forcefully reset cache.
+        :param bool|function set_cache: Optionally skip setting cache.
+        :param list cache_tags: Tag the cached results.  See :meth:`invalidate`.
+        :return: Function results.
+        """
+        # setup
+        bust_cache = kwargs.pop('bust_cache', False)
+        set_cache_cb = make_callback(kwargs.pop('set_cache', True))
+        tags = self.make_tags(kwargs.pop('cache_tags', ()), *args, **kwargs)
+        timings = {} if self.hooks.enabled else None
+        hash_key = None
+
+        try:
+            await self.refresh_generation()
+            start = monotonic()
+            hash_key = self.make_key(*args, **kwargs)
+            if timings is not None:
+                timings['hash'] = monotonic() - start
+
+            func_akw = args, kwargs
+
+            # Guard, don't get results from cache.
+            if bust_cache:
+                self.statistics.incr('busts')
+                await self.run_in_executor(self.__delitem__, hash_key)
+                return await self.put_cache_results(hash_key, func_akw, set_cache_cb, tags)
+
+            # Results are in cache, use results
+            start = monotonic()
+            entry = await self.get_entry_async(hash_key, timings)
+            self.statistics.observe('lookup', monotonic() - start)
+
+            if entry is not None:
+                is_stale = entry.is_stale(self.xfetch_beta)
+                if timings is not None and (not is_stale or self.stale_ex):
+                    self.hooks.emit('on_hit', hash_key, self.func.__name__, timings)
+
+                # Guard, fresh results
+                if not is_stale:
+                    self.statistics.incr('hits')
+                    return entry.value
+
+                # Past soft expiration, serve stale results and refresh in the background
+                if self.stale_ex:
+                    self.statistics.incr('hits')
+                    self.refresh_in_background(hash_key, func_akw, set_cache_cb, tags, entry)
+                    return entry.value
+
+            self.statistics.incr('misses')
+            if timings is not None:
+                self.hooks.emit('on_miss', hash_key, self.func.__name__, timings)
+
+            # Refresh early, ahead of expiration
+            if entry is not None:
+                refresh = self.refresh_cache_results
+                results = await self.coalesce(hash_key, refresh, hash_key, func_akw, set_cache_cb, tags, entry)
+                return entry.value if results is None else results
+
+            # Set and return results from cache
+            return await self.coalesce(hash_key, self.compute_cache_results, hash_key, func_akw, set_cache_cb, tags)
+
+        except Exception as error:
+            if self.hooks.enabled:
+                self.hooks.emit('on_error', hash_key, self.func.__name__, error=error)
+            raise
+
+    async def many(self, args_list, **kwargs):
+        """
+        Batch call.  One round trip gets every key, misses are awaited together and stored in one pipeline.
+
+        :param list args_list: Positional arguments per call.  Tuples are unpacked, anything else is one argument.
+        :param dict kwargs: Keyword arguments passed to every call.
+        :param bool bust_cache: Forcefully reset cache.
+        :param bool|function set_cache: Optionally skip setting cache.
+        :param list cache_tags: Tag the cached results.  See :meth:`invalidate`.
+        :return: Function results, in input order.
+        :rtype: list
+
+        Hook timings are per batch.
+        """
+        # setup
+        bust_cache = kwargs.pop('bust_cache', False)
+        set_cache_cb = make_callback(kwargs.pop('set_cache', True))
+        cache_tags = kwargs.pop('cache_tags', ())
+        args_list = [unpack_args(args) for args in args_list]
+        timings = {} if self.hooks.enabled else None
+
+        try:
+            await self.refresh_generation()
+            start = monotonic()
+            keys = [self.make_key(*args, **kwargs) for args in args_list]
+            if timings is not None:
+                timings['hash'] = monotonic() - start
+
+            # Guard, don't get results from cache.
+            if bust_cache:
+                self.statistics.incr('busts')
+                await self.run_in_executor(self.delete_many, keys)
+
+            start = monotonic()
+            entries = {} if bust_cache else await self.run_in_executor(self.get_many, keys, timings)
+            self.statistics.observe('lookup', monotonic() - start)
+            results, misses = {}, OrderedDict()
+
+            for key, args in zip(keys, args_list):
+
+                # Guard, duplicate arguments
+                if key in results or key in misses:
+                    continue
+
+                entry = entries.get(key)
+                if entry is not None:
+
+                    # Guard, fresh results
+                    if not entry.is_stale(self.xfetch_beta):
+                        self.statistics.incr('hits')
+                        if timings is not None:
+                            self.hooks.emit('on_hit', key, self.func.__name__, timings)
+                        results[key] = entry.value
+                        continue
+
+                    # Past soft expiration, serve stale results and refresh in the background
+                    if self.stale_ex:
+                        self.statistics.incr('hits')
+                        if timings is not None:
+                            self.hooks.emit('on_hit', key, self.func.__name__, timings)
+                        tags = self.make_tags(cache_tags, *args, **kwargs)
+                        self.refresh_in_background(key, (args, kwargs), set_cache_cb, tags, entry)
+                        results[key] = entry.value
+                        continue
+
+                self.statistics.incr('misses')
+                if timings is not None:
+                    self.hooks.emit('on_miss', key, self.func.__name__, timings)
+                misses[key] = args, entry
+
+            async def timed_call(args, entry):
+                start = time()
+                call_args, call_kwargs = self.conditional((args, kwargs), entry)
+                func_results = self.revalidated(await self.call_func(*call_args, **call_kwargs), entry)
+                delta = time() - start
+                self.statistics.observe('compute', delta)
+                return func_results, delta
+
+            # get function results, revalidate stale results
+            stored = []
+            computed = await asyncio.gather(*[timed_call(args, entry) for args, entry in misses.values()])
+
+            for (key, (args, _)), (func_results, delta) in zip(misses.items(), computed):
+                results[key] = func_results
+
+                # optionally add results to cache
+                if set_cache_cb(func_results):
+                    stored.append((key, func_results, delta, self.make_tags(cache_tags, *args, **kwargs)))
+                else:
+                    self.statistics.incr('skipped_stores')
+
+            if stored:
+                await self.run_in_executor(self.set_many, stored)
+
+            return [results[key] for key in keys]
+
+        except Exception as error:
+            if self.hooks.enabled:
+                self.hooks.emit('on_error', None, self.func.__name__, error=error)
+            raise
+
+    def start(self, key, coro_func, *args):
+        """Schedule one computation per key.  Return the pending future."""
+
+        future = self.inflight.get(key)
+        if future is not None:
+            return future
+
+        future = asyncio.ensure_future(coro_func(*args))
+        self.inflight[key] = future
+
+        def done(_):
+            if self.inflight.get(key) is future:
+                del self.inflight[key]
+
+        future.add_done_callback(done)
+        return future
+
+    def refresh_in_background(self, key, *args):
+        """Refresh stale results, not awaited.  Failures are logged, stale results stay in place until they expire."""
+        future = self.start(key, self.refresh_cache_results, key, *args)
+        future.add_done_callback(partial(log_failure, key))
+
+    async def coalesce(self, key, coro_func, *args):
+        """Await one computation per key.  A cancelled caller doesn't cancel the others."""
+        return await asyncio.shield(self.start(key, coro_func, *args))
+
+    async def compute_cache_results(self, key, func_akw, set_cache_cb, tags=()):
+        """Put function results into cache.  Hold the cross-process lock, if any."""
+
+        # Guard, no cross-process coordination
+        if self.lock is None:
+            return await self.put_cache_results(key, func_akw, set_cache_cb, tags)
+
+        lock = self.lock
+        deadline = monotonic() + lock.timeout
+
+        while True:
+            token = await self.run_in_executor(lock.acquire, self.redis, key)
+
+            if token is not None:
+                try:
+                    # Another process may have finished while we raced for the lock
+                    entry = await self.run_in_executor(self.get_entry, key)
+                    if entry is not None:
+                        return entry.value
+                    return await self.put_cache_results(key, func_akw, set_cache_cb, tags)
+                finally:
+                    await self.run_in_executor(lock.release, self.redis, key, token)
+
+            # Guard, don't wait on the holder
+            if lock.policy == lock.COMPUTE or monotonic() >= deadline:
+                return await self.put_cache_results(key, func_akw, set_cache_cb, tags)
+
+            await asyncio.sleep(lock.interval)
+
+            entry = await self.run_in_executor(self.get_entry, key)
+            if entry is not None:
+                return entry.value
+
+    async def refresh_cache_results(self, key, func_akw, set_cache_cb, tags=(), stale=None):
+        """Put fresh function results into cache.  Skip if another process holds the lock."""
+
+        # Guard, no cross-process coordination
+        if self.lock is None:
+            return await self.put_cache_results(key, func_akw, set_cache_cb, tags, stale)
+
+        token = await self.run_in_executor(self.lock.acquire, self.redis, key)
+
+        # Guard, another process is refreshing
+        if token is None:
+            return None
+
+        try:
+            return await self.put_cache_results(key, func_akw, set_cache_cb, tags, stale)
+        finally:
+            await self.run_in_executor(self.lock.release, self.redis, key, token)
+
+    async def put_cache_results(self, key, func_akw, set_cache_cb, tags=(), stale=None):
+        """Put function results into cache.  Revalidate ``stale`` results, if any."""
+        args, kwargs = self.conditional(func_akw, stale)
+
+        # get function results
+        start = time()
+        func_results = self.revalidated(await self.call_func(*args, **kwargs), stale)
+        delta = time() - start
+        self.statistics.observe('compute', delta)
+
+        # optionally add results to cache
+        if set_cache_cb(func_results):
+            await self.run_in_executor(self.set_entry, key, func_results, delta, tags)
+        else:
+            self.statistics.incr('skipped_stores')
+        return func_results
+
+    async def call_func(self, *args, **kwargs):
+        """Await the decorated function."""
+        return await self.func(*args, **kwargs)
+
+    async def get_entry_async(self, key, timings=None):
+        """Get results and metadata from cache.  Local tier hits don't leave the event loop."""
+
+        if self.local_cache is not None:
+            value = self.local_cache.get(key, MISSING)
+            if value is not MISSING:
+                return Entry.wrap(value)
+
+        return await self.run_in_executor(self.get_entry, key, timings)
+
+    async def refresh_generation(self):
+        """Read the generation counter off the event loop, when due.  Keeps :meth:`make_key` from blocking."""
+        if self.generation.expired():
+            await self.run_in_executor(self.generation.refresh, self.redis)
+
+    def run_in_executor(self, func, *args):
+        """Run blocking ``func`` off the event loop."""
+        return asyncio.get_event_loop().run_in_executor(self.executor, func, *args)
+
+
+def log_failure(key, future):
+    """Done callback of background refreshes.  Log the exception, nothing else retrieves it."""
+
+    # Guard, cancelled, e.g. the loop closed
+    if future.cancelled():
+        return
+
+    error = future.exception()
+    if error is not None:
+        logger.error('Refreshing results failed for hash: %s', key, exc_info=(type(error), error, error.__traceback__))
+
+
+class AsyncMemoizeRequest(MemoizeRequest, AsyncMemoize):
+    """Cache session method calls.  Requests are sent, and bodies stored apart are read, from the executor."""
+
+    async def __call__(self, *args, **kwargs):
+        """
+        Call decorated function.
+
+        :param tuple args: Function args.
+        :param dict kwargs: Function kwargs.
+        :return: Function results.
+        """
+        # Guard, don't cache method.
+        if not self.use_cache:
+            return await self.call_func(*args, **kwargs)
+
+        # Don't cache errors.
+        kwargs.setdefault('set_cache', self.cacheable)
+
+        response = await AsyncMemoize.__call__(self, *args, **kwargs)
+        return await self.load(self.reloadable(response, args, kwargs))
+
+    async def many(self, args_list, **kwargs):
+        """
+        Batch call decorated function.  See :meth:`AsyncMemoize.many`.
+
+        :param list args_list: Function args per call.
+        :param dict kwargs: Function kwargs, passed to every call.
+        :return: Function results, in input order.
+        """
+        # Guard, don't cache method.
+        if not self.use_cache:
+            return await asyncio.gather(*[self.call_func(*unpack_args(args), **kwargs) for args in args_list])
+
+        # Don't cache errors.
+        kwargs.setdefault('set_cache', self.cacheable)
+
+        args_list = list(args_list)
+        responses = await AsyncMemoize.many(self, args_list, **kwargs)
+        return await asyncio.gather(*[self.load(self.reloadable(response, unpack_args(args), kwargs))
+                                      for response, args in zip(responses, args_list)])
+
+    async def call_func(self, *args, **kwargs):
+        """Send the request from the executor."""
+        return await self.run_in_executor(partial(self.func, *args, **kwargs))
+
+    async def load(self, response):
+        """
+        Read the body of a cached response from the executor, see :class:`LazyResponse`.  Its ``content`` doesn't block
+        the event loop, a body no longer cached is sent again from the executor too.
+        """
+
+        # Guard, body in the response
+        if not isinstance(response, LazyResponse) or response._content is not False:
+            return response
+
+        await self.run_in_executor(getattr, response, 'content')
+        return response
+
+
+class AsyncSession(Session):
+    """:class:`Session` with awaitable memoized methods.  Shares keys and storage with :class:`Session`."""
+
+    memoize_class = AsyncMemoizeRequest
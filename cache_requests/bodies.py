@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+:mod:`cache_requests.bodies`
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+.. moduleauthor:: Manu Phatak <bionikspoon@gmail.com>
+
+Disk storage for large response bodies.  Bodies are written once, to files named by their SHA-256, and read through
+read only memory maps.  Redis keeps the digest only, so its memory and snapshots stay small.
+
+Files are shared by every entry with the same body and outlive the entries, see :meth:`DiskBodies.prune`.
+
+Private API
+***********
+    * :class:`DiskBodies`
+    * :func:`default_dir`
+
+Source
+******
+"""
+from __future__ import absolute_import
+
+import errno
+import mmap
+import os
+from hashlib import sha256
+from tempfile import mkstemp
+from time import time
+
+__all__ = ['DiskBodies', 'default_dir']
+
+
+def default_dir(connection):
+    """
+    Body directory next to a :mod:`redislite` db file, e.g. ``/tmp/app.cache_requests.redislite.db.bodies``.
+
+    :raises ValueError: Connection has no db file.
+    """
+    db = getattr(connection, 'db', None)
+
+    # Guard, plain redis server
+    if not db:
+        raise ValueError('Connection has no db file, pass body_dir.')
+
+    return '%s.bodies' % db
+
+
+class DiskBodies(object):
+    """Content addressed body files in one directory."""
+
+    def __init__(self, directory):
+        """:param str directory: Body directory, created on first write."""
+        self.directory = directory
+
+    def __repr__(self):
+        return '<%s %r>' % (self.__class__.__name__, self.directory)
+
+    def path(self, digest):
+        """File of a body.  Fanned out by the first two hex digits of its digest."""
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def put(self, body, digest=None):
+        """
+        Write a body, unless a file with its digest exists.  Existing files are touched, see :meth:`prune`.
+
+        :param bytes body: Body.
+        :param str digest: SHA-256 hex digest of the body, if known.
+        :return: Hex digest.
+        :rtype: str
+        """
+        digest = digest or sha256(body).hexdigest()
+        path = self.path(digest)
+
+        # Guard, already stored
+        try:
+            os.utime(path, None)
+            return digest
+        except EnvironmentError as e:
+            if e.errno != errno.ENOENT:
+                raise
+
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory)
+        except EnvironmentError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+        # Write apart and rename, readers never see a partial file
+        fd, temp = mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(body)
+            os.rename(temp, path)
+        except EnvironmentError:
+            os.remove(temp)
+
+            # Guard, a concurrent writer won the rename
+            if not os.path.exists(path):
+                raise
+
+        return digest
+
+    def open(self, digest):
+        """
+        Read only memory map of a body.  Pages are read from the file as they are accessed.  Holds a file descriptor
+        until closed.
+
+        :param str digest: Hex digest, from :meth:`put`.
+        :rtype: mmap.mmap|bytes
+        :raises LookupError: Body file was pruned.
+        """
+        try:
+            f = open(self.path(digest), 'rb')
+        except EnvironmentError as e:
+            if e.errno != errno.ENOENT:
+                raise
+            raise LookupError('Body %s is no longer on disk.' % digest)
+
+        with f:
+            # Guard, empty files can't be mapped
+            if not os.fstat(f.fileno()).st_size:
+                return b''
+
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def prune(self, age):
+        """
+        Delete body files not written for ``age`` seconds.  Use the longest time an entry is kept, ``ex`` plus
+        ``stale_ex`` or ``revalidate_ex``.  Maps already open stay readable.
+
+        :param float age: Seconds.
+        :return: Number of files deleted.
+        :rtype: int
+        """
+        deadline = time() - age
+        deleted = 0
+
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    if os.path.getmtime(path) < deadline:
+                        os.remove(path)
+                        deleted += 1
+                except EnvironmentError as e:  # Deleted by a concurrent prune.
+                    if e.errno != errno.ENOENT:
+                        raise
+
+        return deleted
@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+:mod:`cache_requests.cache_control`
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+.. moduleauthor:: Manu Phatak <bionikspoon@gmail.com>
+
+HTTP caching policy.  Derive each response's expiration from ``Cache-Control``, ``Expires`` and ``Age`` headers.
+Revalidate expired responses with their ``ETag`` and ``Last-Modified`` validators.
+
+Public Api
+**********
+    * :class:`HTTPCachePolicy`
+
+Private API
+***********
+    * :func:`parse_cache_control`
+    * :func:`parse_date`
+    * :func:`conditional_headers`
+    * :func:`refresh_response`
+
+Source
+******
+"""
+from __future__ import absolute_import
+
+from email.utils import mktime_tz, parsedate_tz
+from time import time
+
+__all__ = ['HTTPCachePolicy', 'parse_cache_control', 'parse_date', 'conditional_headers', 'refresh_response']
+
+UNMODIFIED_HEADERS = frozenset(['content-length', 'content-encoding', 'transfer-encoding', 'content-range'])
+"""Headers of a ``304`` response never copied onto the stored response.  They describe the empty 304 body."""
+
+CACHEABLE_STATUS = frozenset([200, 203, 204, 300, 301, 308, 404, 405, 410, 414, 501])
+"""Status codes cacheable by default, RFC 7231 section 6.1.  ``206`` is left out, ranges are not stored."""
+
+
+def parse_cache_control(header):
+    """
+    Parse a ``Cache-Control`` header.
+
+    :param str header: Header value, e.g. ``'public, max-age=60'``.
+    :return: Directive values by lowercase name.  ``True`` for directives without a value.
+    :rtype: dict
+    """
+
+    directives = {}
+    for directive in header.split(','):
+        name, _, value = directive.partition('=')
+        name = name.strip().lower()
+        if name:
+            directives[name] = value.strip().strip('"') or True
+    return directives
+
+
+def parse_date(value):
+    """
+    Parse an HTTP date.
+
+    :param str value: Date, e.g. ``'Wed, 21 Oct 2015 07:28:00 GMT'``.
+    :return: Unix timestamp.  ``None`` if invalid.
+    :rtype: float
+    """
+
+    parsed = parsedate_tz(value) if value else None
+    return None if parsed is None else mktime_tz(parsed)
+
+
+def parse_seconds(value):
+    """Delta seconds directive or header.  ``None`` if invalid."""
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def conditional_headers(response):
+    """
+    Request headers to revalidate a stored response.
+
+    :param requests.Response response: Stored response.
+    :return: ``If-None-Match`` and ``If-Modified-Since`` headers, empty without validators.
+    :rtype: dict
+    """
+
+    headers = {}
+    if response.headers.get('ETag'):
+        headers['If-None-Match'] = response.headers['ETag']
+    if response.headers.get('Last-Modified'):
+        headers['If-Modified-Since'] = response.headers['Last-Modified']
+    return headers
+
+
+def refresh_response(response, not_modified):
+    """
+    Update a stored response with the headers of a ``304 Not Modified`` response, RFC 7234 section 4.3.4.
+
+    :param requests.Response response: Stored response.
+    :param requests.Response not_modified: ``304`` response.
+    :return: Stored response.
+    :rtype: requests.Response
+    """
+
+    for name, value in not_modified.headers.items():
+        if name.lower() not in UNMODIFIED_HEADERS:
+            response.headers[name] = value
+    return response
+
+
+class HTTPCachePolicy(object):
+    """
+    Cache responses per HTTP caching semantics, RFC 7234.
+
+    * ``no-store``, ``no-cache`` and ``Vary: *`` responses are never stored.
+    * Freshness comes from ``s-maxage`` (shared caches), ``max-age``, then ``Expires``, less the ``Age`` header.
+    * Responses without freshness headers are stored for ``ex``, unless ``heuristic`` is off.
+
+    Expiration is capped by the session ``ex``.
+    """
+
+    def __init__(self, shared=False, heuristic=True):
+        """
+        :param bool shared: Cache shared between users.  Skip ``private`` responses, honor ``s-maxage``.
+        :param bool heuristic: Store successful responses without freshness headers, for ``ex``.
+        """
+
+        self.shared = shared
+        self.heuristic = heuristic
+
+    def ttl(self, response, ex):
+        """
+        Seconds to keep a response.
+
+        :param requests.Response response: Response.
+        :param float ex: Upper bound, the session ``ex``.
+        :return: Expiration time in seconds.  ``None`` if the response must not be stored.
+        :rtype: float
+        """
+
+        # Guard, not cacheable by status
+        if response.status_code not in CACHEABLE_STATUS:
+            return None
+
+        headers = response.headers
+        directives = parse_cache_control(headers.get('Cache-Control', ''))
+
+        # Guard, storing or serving without revalidation forbidden
+        if 'no-store' in directives or 'no-cache' in directives:
+            return None
+
+        # Guard, private response in a shared cache
+        if self.shared and 'private' in directives:
+            return None
+
+        # Guard, varies on anything
+        if headers.get('Vary', '').strip() == '*':
+            return None
+
+        lifetime = self.lifetime(headers, directives)
+
+        # Guard, no freshness information
+        if lifetime is None:
+            return ex if self.heuristic and response.status_code < 400 else None
+
+        ttl = lifetime - (parse_seconds(headers.get('Age')) or 0)
+        return min(ttl, ex) if ttl > 0 else None
+
+    def lifetime(self, headers, directives):
+        """Freshness lifetime in seconds, from directives or ``Expires``.  ``None`` without freshness headers."""
+
+        if self.shared and 's-maxage' in directives:
+            return parse_seconds(directives['s-maxage']) or 0
+
+        if 'max-age' in directives:
+            return parse_seconds(directives['max-age']) or 0
+
+        # Guard, no expires
+        if 'Expires' not in headers:
+            return None
+
+        # Invalid dates, e.g. ``0``, mean already expired
+        expires = parse_date(headers['Expires'])
+        if expires is None:
+            return 0
+
+        date = parse_date(headers.get('Date'))
+        return expires - (time() if date is None else date)
+
+    def __repr__(self):
+        return '%s(shared=%r, heuristic=%r)' % (self.__class__.__name__, self.shared, self.heuristic)
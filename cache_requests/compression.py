@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+:mod:`cache_requests.compression`
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+.. moduleauthor:: Manu Phatak <bionikspoon@gmail.com>
+
+Compress large stored values.  The compressor is marked in the value header, reads decompress automatically.
+
+Public Api
+**********
+    * :class:`ZlibCompressor`
+    * :class:`LZ4Compressor`
+    * :class:`ZstdCompressor`
+
+Private API
+***********
+    * :func:`get_compressor`
+
+Source
+******
+"""
+from __future__ import absolute_import
+
+import zlib
+
+__all__ = ['Compressor', 'ZlibCompressor', 'LZ4Compressor', 'ZstdCompressor', 'get_compressor']
+
+
+class Compressor(object):
+    """Compressor interface."""
+
+    name = None
+    """Name used to select the compressor."""
+
+    code = None
+    """Unique id, 1-15, stored in the value header.  Never reuse a code."""
+
+    def __init__(self, threshold=1024):
+        """:param int threshold: Only compress values of at least this many bytes."""
+        self.threshold = threshold
+
+    def compress(self, data):
+        raise NotImplementedError
+
+    def decompress(self, data):
+        raise NotImplementedError
+
+    def __repr__(self):
+        return '%s(threshold=%r)' % (self.__class__.__name__, self.threshold)
+
+
+class ZlibCompressor(Compressor):
+    """Built in."""
+
+    name = 'zlib'
+    code = 1
+
+    def __init__(self, threshold=1024, level=6):
+        """
+        :param int threshold: Only compress values of at least this many bytes.
+        :param int level: Compression level, 1 (fast) to 9 (small).
+        """
+        super(ZlibCompressor, self).__init__(threshold)
+        self.level = level
+
+    def compress(self, data):
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data):
+        return zlib.decompress(data)
+
+
+class LZ4Compressor(Compressor):
+    """Very fast.  Requires :mod:`lz4`."""
+
+    name = 'lz4'
+    code = 2
+
+    def compress(self, data):
+        return self.lz4.compress(data)
+
+    def decompress(self, data):
+        return self.lz4.decompress(data)
+
+    @property
+    def lz4(self):
+        try:
+            import lz4.frame
+        except ImportError:
+            raise ImportError('LZ4Compressor requires lz4.  Install it with `pip install lz4`.')
+        return lz4.frame
+
+
+class ZstdCompressor(Compressor):
+    """Fast, small.  Requires :mod:`zstandard`."""
+
+    name = 'zstd'
+    code = 3
+
+    def __init__(self, threshold=1024, level=3):
+        """
+        :param int threshold: Only compress values of at least this many bytes.
+        :param int level: Compression level, 1 (fast) to 22 (small).
+        """
+        super(ZstdCompressor, self).__init__(threshold)
+        self.level = level
+
+    def compress(self, data):
+        return self.zstd.ZstdCompressor(level=self.level).compress(data)
+
+    def decompress(self, data):
+        return self.zstd.ZstdDecompressor().decompress(data)
+
+    @property
+    def zstd(self):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError('ZstdCompressor requires zstandard.  Install it with `pip install zstandard`.')
+        return zstandard
+
+
+compressors = dict((compressor.code, compressor) for compressor in (
+    ZlibCompressor(), LZ4Compressor(), ZstdCompressor()))
+"""Default instance per code.  Used to read values, whatever compressor stored them."""
+
+
+def get_compressor(compressor=None):
+    """
+    Resolve compressor setting.
+
+    :param str|Compressor compressor: Compressor instance or name.  ``None`` for no compression.
+    :rtype: Compressor
+    """
+
+    # Guard, no compression
+    if compressor is None:
+        return None
+
+    # Guard, already a compressor.  Custom compressors are registered to read their values back.
+    if isinstance(compressor, Compressor):
+        compressors.setdefault(compressor.code, compressor)
+        return compressor
+
+    for instance in compressors.values():
+        if instance.name == compressor:
+            return instance
+
+    names = ', '.join(sorted(instance.name for instance in compressors.values()))
+    raise ValueError('Unknown compressor %r.  Compressors: %s' % (compressor, names))
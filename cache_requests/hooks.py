@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+:mod:`cache_requests.hooks`
+~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+.. moduleauthor:: Manu Phatak <bionikspoon@gmail.com>
+
+Instrumentation hooks for tracing and profiling.  Timings are only measured while a callback is registered.
+
+Public Api
+**********
+    * :class:`Hooks`
+    * :class:`Event`
+
+Source
+******
+"""
+from __future__ import absolute_import
+
+import logging
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+__all__ = ['Hooks', 'Event']
+
+
+class Event(namedtuple('Event', 'hook key name timings error')):
+    """
+    Passed to every callback.
+
+    :param str hook: Hook name, e.g. ``'on_hit'``.
+    :param str key: Cache key.
+    :param str name: Decorated function name.  ``None`` for session wide invalidation.
+    :param dict timings: Seconds spent per step: ``hash``, ``io``, ``serialize``, ``deserialize`` and ``call``.
+    :param Exception error: Raised exception, ``on_error`` only.
+    """
+
+    __slots__ = ()
+
+
+class Hooks(object):
+    """
+    Instrumentation callbacks.
+
+    * ``on_hit``: Results served from cache.  Timings: ``hash``, ``io``, ``deserialize``.
+    * ``on_miss``: Results not in cache.  Timings: ``hash``, ``io``.
+    * ``on_store``: Results stored.  Timings: ``call``, ``serialize``, ``io``.
+    * ``on_evict``: Entry deleted by ``bust_cache``, ``invalidate`` or ``del``.  Timings: ``io``.
+    * ``on_error``: The decorated function or storage raised.  Re-raised after the callbacks.
+    """
+
+    names = ('on_hit', 'on_miss', 'on_store', 'on_evict', 'on_error')
+    """Hook names."""
+
+    def __init__(self, **callbacks):
+        """:param dict callbacks: A callback, or a list of callbacks, by hook name."""
+
+        self.callbacks = dict((name, []) for name in self.names)
+        self.enabled = False
+
+        for name, callback in callbacks.items():
+            for func in callback if isinstance(callback, (list, tuple)) else [callback]:
+                self.register(name, func)
+
+    def register(self, name, callback):
+        """
+        Add callback.  Usable as a decorator.
+
+        :param str name: Hook name.
+        :param function callback: Called with an :class:`Event`.
+        """
+
+        if name not in self.callbacks:
+            raise ValueError('Unknown hook %r.  Hooks: %s' % (name, ', '.join(self.names)))
+
+        self.callbacks[name].append(callback)
+        self.enabled = True
+        return callback
+
+    def unregister(self, name, callback):
+        """Remove callback."""
+
+        self.callbacks[name].remove(callback)
+        self.enabled = any(self.callbacks.values())
+
+    def emit(self, name, key, func_name, timings=None, error=None):
+        """Call every callback of hook ``name``.  Failing callbacks are logged, never raised."""
+
+        callbacks = self.callbacks[name]
+
+        # Guard, nothing to call
+        if not callbacks:
+            return
+
+        event = Event(name, key, func_name, timings or {}, error)
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception:  # catch all, instrumentation is not the point of failure.
+                logger.exception('Hook %s failed.', name)
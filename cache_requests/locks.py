@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+:mod:`cache_requests.locks`
+~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+.. moduleauthor:: Manu Phatak <bionikspoon@gmail.com>
+
+Coordinate concurrent cache misses.
+
+Public Api
+**********
+    * :class:`DogpileLock`
+
+Private API
+***********
+    * :class:`SingleFlight`
+
+Source
+******
+"""
+from __future__ import absolute_import
+
+import sys
+from threading import Event, Lock
+from time import sleep
+from uuid import uuid4
+
+from six import reraise
+
+from ._compat import monotonic
+
+__all__ = ['DogpileLock', 'SingleFlight']
+
+
+class SingleFlight(object):
+    """Coalesce concurrent calls per key.  The first caller computes, the rest wait for its results."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._calls = {}
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        Call ``func`` once per key, no matter how many threads ask at the same time.
+
+        :param key: Call identity.
+        :param function func: Function to be called.
+        :return: Function results, shared by every caller waiting on the same key.
+        """
+
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+
+        # Guard, another thread is computing.  Wait for it.
+        if not is_leader:
+            call.done.wait()
+            if call.exc_info is not None:
+                reraise(*call.exc_info)
+            return call.results
+
+        try:
+            call.results = func(*args, **kwargs)
+        except BaseException:
+            call.exc_info = sys.exc_info()
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.results
+
+    def __len__(self):
+        return len(self._calls)
+
+
+class _Call(object):
+    """In flight call state."""
+
+    __slots__ = 'done', 'results', 'exc_info'
+
+    def __init__(self):
+        self.done = Event()
+        self.results = None
+        self.exc_info = None
+
+
+class DogpileLock(object):
+    """
+    Cross-process lock per cache key.  Backed by atomic redis primitives.
+
+    One process recomputes a missing entry, the others follow ``policy``:
+
+    ``'wait'``
+        Poll the cache until the value is stored, the lock is released or ``timeout`` runs out.
+    ``'compute'``
+        Don't wait, compute anyway.
+    """
+
+    WAIT = 'wait'
+    COMPUTE = 'compute'
+
+    RELEASE_SCRIPT = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('del', KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(self, lease=30, policy=WAIT, timeout=None, interval=0.05):
+        """
+        Set options.
+
+        :param float lease: Lock expiration in seconds.  Frees the lock if the holder dies.
+        :param str policy: ``'wait'`` or ``'compute'``, when another process holds the lock.
+        :param float timeout: Maximum seconds to wait for the holder.  Defaults to ``lease``.
+        :param float interval: Seconds between polls while waiting.
+        """
+
+        if policy not in (self.WAIT, self.COMPUTE):
+            raise ValueError('policy must be %r or %r.' % (self.WAIT, self.COMPUTE))
+
+        self.lease = lease
+        self.policy = policy
+        self.timeout = lease if timeout is None else timeout
+        self.interval = interval
+
+    def acquire(self, redis, key):
+        """Try to take the lock.  Return a release token, or ``None`` if it is held elsewhere."""
+
+        token = uuid4().hex
+        if redis.set(self.lock_key(key), token, nx=True, px=int(self.lease * 1000)):
+            return token
+        return None
+
+    def release(self, redis, key, token):
+        """Release the lock, only if it is still ours."""
+
+        return redis.eval(self.RELEASE_SCRIPT, 1, self.lock_key(key), token)
+
+    def run(self, redis, key, compute, lookup):
+        """
+        Compute under the lock or wait for another process' results.
+
+        :param redis: Redis connection handle.
+        :param str key: Cache key.
+        :param function compute: Compute and store results.
+        :param function lookup: Get results from cache, ``None`` if missing.
+        :return: Results.
+        """
+
+        deadline = monotonic() + self.timeout
+
+        while True:
+            token = self.acquire(redis, key)
+
+            if token is not None:
+                try:
+                    # Another process may have finished while we raced for the lock
+                    results = lookup()
+                    return compute() if results is None else results
+                finally:
+                    self.release(redis, key, token)
+
+            # Guard, don't wait on the holder
+            if self.policy == self.COMPUTE or monotonic() >= deadline:
+                return compute()
+
+            sleep(self.interval)
+
+            results = lookup()
+            if results is not None:
+                return results
+
+    @staticmethod
+    def lock_key(key):
+        return 'lock:%s' % key
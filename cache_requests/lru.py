@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+:mod:`cache_requests.lru`
+~~~~~~~~~~~~~~~~~~~~~~~~~
+
+.. moduleauthor:: Manu Phatak <bionikspoon@gmail.com>
+
+In-process LRU tier.  Sits in front of :mod:`redislite` storage.
+
+Public Api
+**********
+    * :class:`LRUCache`
+
+Source
+******
+"""
+from __future__ import absolute_import
+
+from collections import OrderedDict
+from threading import RLock
+
+from ._compat import monotonic
+
+__all__ = ['LRUCache']
+
+
+class LRUCache(object):
+    """Bounded, thread safe, in-process LRU cache.  Entries expire after ``ex`` seconds."""
+
+    def __init__(self, maxsize=1024, maxbytes=None):
+        """
+        Set limits.
+
+        :param int maxsize: Maximum number of entries.
+        :param int maxbytes: Maximum total size of entries, in bytes. ``None`` for no limit.
+        """
+
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.currbytes = 0
+        self._data = OrderedDict()
+        self._lock = RLock()
+
+    def get(self, key, default=None):
+        """Get value, mark as recently used.  Expired entries are dropped."""
+
+        with self._lock:
+            try:
+                value, size, expires = self._data.pop(key)
+            except KeyError:
+                return default
+
+            # Guard, expired
+            if expires is not None and expires <= monotonic():
+                self.currbytes -= size
+                return default
+
+            self._data[key] = value, size, expires
+            return value
+
+    def set(self, key, value, size=0, ex=None):
+        """
+        Store value, evict least recently used entries to stay within limits.
+
+        :param key: Cache key.
+        :param value: Value to store.
+        :param int size: Size of value in bytes, counted against ``maxbytes``.
+        :param int ex: Expiration time in seconds.
+        """
+
+        # Guard, entry can never fit
+        if self.maxbytes is not None and size > self.maxbytes:
+            self.pop(key)
+            return
+
+        expires = None if ex is None else monotonic() + ex
+
+        with self._lock:
+            self.pop(key)
+            self._data[key] = value, size, expires
+            self.currbytes += size
+
+            while len(self._data) > self.maxsize or (self.maxbytes is not None and self.currbytes > self.maxbytes):
+                _, (_, evicted_size, _) = self._data.popitem(last=False)
+                self.currbytes -= evicted_size
+
+    def pop(self, key, default=None):
+        """Remove entry, return its value."""
+
+        with self._lock:
+            try:
+                value, size, _ = self._data.pop(key)
+            except KeyError:
+                return default
+
+            self.currbytes -= size
+            return value
+
+    def clear(self):
+        """Remove all entries."""
+
+        with self._lock:
+            self._data.clear()
+            self.currbytes = 0
+
+    def __getitem__(self, key):
+        value = self.get(key, _missing)
+        if value is _missing:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __delitem__(self, key):
+        self.pop(key)
+
+    def __contains__(self, key):
+        return self.get(key, _missing) is not _missing
+
+    def __len__(self):
+        return len(self._data)
+
+
+_missing = object()
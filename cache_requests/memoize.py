@@ -17,17 +17,27 @@ Source
 """
 from __future__ import absolute_import
 
-import logging
+from collections import namedtuple, OrderedDict
 from functools import partial, update_wrapper
+from math import log
+from random import random
+from time import time
 
 import types
 
-from ._compat import pickle
-from .utils import deep_hash, default_connection, make_callback, default_ex
+from redis import ResponseError
 
-logger = logging.getLogger(__name__)
+from . import serializers
+from ._compat import monotonic, signature, Parameter
+from .compression import get_compressor
+from .hooks import Hooks
+from .locks import SingleFlight
+from .refresh import Refresher
+from .stats import Stats
+from .tags import index_tags, invalidate_tags
+from .utils import deep_hash, default_connection, make_callback, default_ex, qualified_name
 
-__all__ = ['Memoize']
+__all__ = ['Memoize', 'Entry', 'Generation', 'MISSING', 'is_negative', 'key_prefix', 'unpack_args']
 
 
 class Memoize(object):
@@ -40,6 +50,20 @@ class Memoize(object):
         :param function func: Function to be decorated.
         :param int ex: Expiration time in seconds.
         :param connection: Redis connection handle.
+        :param LRUCache local_cache: In-process cache tier, checked before redis.
+        :param bool single_flight: Coalesce concurrent misses per key, compute once.
+        :param DogpileLock lock: Coordinate misses across processes sharing the db.
+        :param int stale_ex: Serve stale results this many seconds past ``ex``, refresh in the background.
+        :param float xfetch_beta: Refresh early, with rising probability as expiration nears.  ``1.0`` is typical.
+        :param float ex_jitter: Shorten each entry's ``ex`` by a random fraction, up to ``ex_jitter``, below 1.
+        :param str|Serializer serializer: Serializer instance or name.  Defaults to highest protocol ``'pickle'``.
+        :param str|Compressor compressor: Compress large values.  Compressor instance or name.
+        :param int negative_ex: Cache ``None``, empty and falsy results, with this expiration time in seconds.
+        :param str namespace: Key prefix.  Defaults to the function's module qualified name.
+        :param version: Part of the key prefix.  Change it to stop reading results of older code.
+        :param Hooks hooks: Instrumentation callbacks.  Timings are only measured while a callback is registered.
+        :param function key: Called with the function arguments, returns the value hashed into the cache key.
+        :param list ignore: Parameter names left out of the cache key, e.g. ``['timeout']``.
         """
 
         is_decorator_without_args = func is not None and callable(func)
@@ -51,19 +75,57 @@ class Memoize(object):
 
         return partial(cls, **kwargs)
 
-    def __init__(self, func=None, ex=None, connection=None):
+    def __init__(self, func=None, ex=None, connection=None, local_cache=None, single_flight=False, lock=None,
+                 stale_ex=None, xfetch_beta=None, ex_jitter=None, serializer=None, compressor=None, negative_ex=None,
+                 namespace=None, version=None, hooks=None, key=None, ignore=()):
         """
         Set options.
 
         :param function func: Function to be decorated.
         :param int ex: Expiration time in seconds.
         :param connection: Redis connection handle.
+        :param LRUCache local_cache: In-process cache tier, checked before redis.
+        :param bool single_flight: Coalesce concurrent misses per key, compute once.
+        :param DogpileLock lock: Coordinate misses across processes sharing the db.
+        :param int stale_ex: Serve stale results this many seconds past ``ex``, refresh in the background.
+        :param float xfetch_beta: Refresh early, with rising probability as expiration nears.  ``1.0`` is typical.
+        :param float ex_jitter: Shorten each entry's ``ex`` by a random fraction, up to ``ex_jitter``, below 1.
+        :param str|Serializer serializer: Serializer instance or name.  Defaults to highest protocol ``'pickle'``.
+        :param str|Compressor compressor: Compress large values.  Compressor instance or name.
+        :param int negative_ex: Cache ``None``, empty and falsy results, with this expiration time in seconds.
+        :param str namespace: Key prefix.  Defaults to the function's module qualified name.
+        :param version: Part of the key prefix.  Change it to stop reading results of older code.
+        :param Hooks hooks: Instrumentation callbacks.  Timings are only measured while a callback is registered.
+        :param function key: Called with the function arguments, returns the value hashed into the cache key.
+        :param list ignore: Parameter names left out of the cache key, e.g. ``['timeout']``.
         """
 
+        if ex_jitter is not None and not 0 <= ex_jitter < 1:
+            raise ValueError('ex_jitter must be at least 0 and less than 1, got %r.' % ex_jitter)
+
         update_wrapper(self, func)
         self.func = func
         self.connection = connection or default_connection()
         self.ex = ex or default_ex
+        self.local_cache = local_cache
+        self.single_flight = single_flight
+        self.flight = SingleFlight()
+        self.lock = lock
+        self.stale_ex = stale_ex
+        self.refresher = Refresher()
+        self.xfetch_beta = xfetch_beta
+        self.ex_jitter = ex_jitter
+        self.serializer = serializers.get_serializer(serializer)
+        self.compressor = get_compressor(compressor)
+        self.negative_ex = negative_ex
+        self.namespace = namespace or qualified_name(func)
+        self.version = version
+        self.generation = Generation('%s:generation' % self.prefix)
+        self.statistics = Stats()
+        self.hooks = hooks or Hooks()
+        self.key_func = key
+        self.ignore = frozenset(ignore)
+        self.binder, self.arity = canonical_signature(func, self.ignore)
 
     def __call__(self, *args, **kwargs):
         """
@@ -73,66 +135,631 @@ class Memoize(object):
         :param dict kwargs: Keyword arguments passed to function.
         :param bool bust_cache: Forcefully reset cache.
         :param bool|function set_cache: Optionally skip setting cache.
+        :param list cache_tags: Tag the cached results.  See :meth:`invalidate`.
         :return: Function results.
         """
         # setup
         bust_cache = kwargs.pop('bust_cache', False)
-        hash_key = deep_hash(self.func.__name__, *args, **kwargs)
         set_cache_cb = make_callback(kwargs.pop('set_cache', True))
-        func_akw = args, kwargs
+        tags = self.make_tags(kwargs.pop('cache_tags', ()), *args, **kwargs)
+        timings = {} if self.hooks.enabled else None
+        hash_key = None
+
+        try:
+            start = monotonic()
+            hash_key = self.make_key(*args, **kwargs)
+            if timings is not None:
+                timings['hash'] = monotonic() - start
+
+            func_akw = args, kwargs
+
+            # Guard, don't get results from cache.
+            if bust_cache:
+                self.statistics.incr('busts')
+                del self[hash_key]
+                return self.put_cache_results(hash_key, func_akw, set_cache_cb, tags)
+
+            # Results are in cache, use results
+            start = monotonic()
+            entry = self.get_entry(hash_key, timings)
+            self.statistics.observe('lookup', monotonic() - start)
+
+            if entry is not None:
+                is_stale = entry.is_stale(self.xfetch_beta)
+                if timings is not None and (not is_stale or self.stale_ex):
+                    self.hooks.emit('on_hit', hash_key, self.func.__name__, timings)
+
+                # Guard, fresh results
+                if not is_stale:
+                    self.statistics.incr('hits')
+                    return entry.value
+
+                # Past soft expiration, serve stale results and refresh in the background
+                if self.stale_ex:
+                    self.statistics.incr('hits')
+                    refresh = self.refresh_cache_results
+                    self.refresher.submit(hash_key, refresh, hash_key, func_akw, set_cache_cb, tags, entry)
+                    return entry.value
+
+            self.statistics.incr('misses')
+            if timings is not None:
+                self.hooks.emit('on_miss', hash_key, self.func.__name__, timings)
+
+            # Refresh early, ahead of expiration
+            if entry is not None:
+                results = self.refresh_cache_results(hash_key, func_akw, set_cache_cb, tags, entry)
+                return entry.value if results is None else results
+
+            # Concurrent misses wait on a single computation
+            if self.single_flight:
+                return self.flight.do(hash_key, self.compute_cache_results, hash_key, func_akw, set_cache_cb, tags)
+
+            # Set and return results from cache
+            return self.compute_cache_results(hash_key, func_akw, set_cache_cb, tags)
+
+        except Exception as error:
+            if self.hooks.enabled:
+                self.hooks.emit('on_error', hash_key, self.func.__name__, error=error)
+            raise
+
+    def many(self, args_list, **kwargs):
+        """
+        Batch call.  One round trip gets every key, misses are stored in one pipeline.
+
+        :param list args_list: Positional arguments per call.  Tuples are unpacked, anything else is one argument.
+        :param dict kwargs: Keyword arguments passed to every call.
+        :param bool bust_cache: Forcefully reset cache.
+        :param bool|function set_cache: Optionally skip setting cache.
+        :param list cache_tags: Tag the cached results.  See :meth:`invalidate`.
+        :return: Function results, in input order.
+        :rtype: list
+
+        Hook timings are per batch.
+        """
+        # setup
+        bust_cache = kwargs.pop('bust_cache', False)
+        set_cache_cb = make_callback(kwargs.pop('set_cache', True))
+        cache_tags = kwargs.pop('cache_tags', ())
+        args_list = [unpack_args(args) for args in args_list]
+        timings = {} if self.hooks.enabled else None
+
+        try:
+            start = monotonic()
+            keys = [self.make_key(*args, **kwargs) for args in args_list]
+            if timings is not None:
+                timings['hash'] = monotonic() - start
+
+            # Guard, don't get results from cache.
+            if bust_cache:
+                self.statistics.incr('busts')
+                self.delete_many(keys)
+
+            start = monotonic()
+            entries = {} if bust_cache else self.get_many(keys, timings)
+            self.statistics.observe('lookup', monotonic() - start)
+            results, stored = {}, []
+
+            for key, args in zip(keys, args_list):
+
+                # Guard, duplicate arguments
+                if key in results:
+                    continue
+
+                entry = entries.get(key)
+                if entry is not None:
+
+                    # Guard, fresh results
+                    if not entry.is_stale(self.xfetch_beta):
+                        self.statistics.incr('hits')
+                        if timings is not None:
+                            self.hooks.emit('on_hit', key, self.func.__name__, timings)
+                        results[key] = entry.value
+                        continue
+
+                    # Past soft expiration, serve stale results and refresh in the background
+                    if self.stale_ex:
+                        self.statistics.incr('hits')
+                        if timings is not None:
+                            self.hooks.emit('on_hit', key, self.func.__name__, timings)
+                        tags = self.make_tags(cache_tags, *args, **kwargs)
+                        refresh = self.refresh_cache_results
+                        self.refresher.submit(key, refresh, key, (args, kwargs), set_cache_cb, tags, entry)
+                        results[key] = entry.value
+                        continue
+
+                self.statistics.incr('misses')
+                if timings is not None:
+                    self.hooks.emit('on_miss', key, self.func.__name__, timings)
+
+                # get function results, revalidate stale results
+                start = time()
+                call_args, call_kwargs = self.conditional((args, kwargs), entry)
+                results[key] = self.revalidated(self.func(*call_args, **call_kwargs), entry)
+                delta = time() - start
+                self.statistics.observe('compute', delta)
+
+                # optionally add results to cache
+                if set_cache_cb(results[key]):
+                    stored.append((key, results[key], delta, self.make_tags(cache_tags, *args, **kwargs)))
+                else:
+                    self.statistics.incr('skipped_stores')
+
+            if stored:
+                self.set_many(stored)
+
+            return [results[key] for key in keys]
+
+        except Exception as error:
+            if self.hooks.enabled:
+                self.hooks.emit('on_error', None, self.func.__name__, error=error)
+            raise
+
+    def make_key(self, *args, **kwargs):
+        """Hash function arguments into a cache key.  Prefixed with namespace, version and generation."""
+        generation = self.generation.get(self.redis)
+
+        if self.key_func is not None:
+            digest = deep_hash(self.func.__name__, self.key_func(*args, **kwargs))
+        else:
+            args, kwargs = self.bind(args, kwargs)
+            digest = deep_hash(self.func.__name__, *args, **kwargs)
+
+        return '%s:%s:%s' % (self.prefix, generation, digest)
+
+    def bind(self, args, kwargs):
+        """
+        Canonical arguments.  Arguments are bound to the function signature: positional where possible, defaults
+        filled in and ``ignore`` parameters left out.  ``f(1)``, ``f(1, b=2)`` and ``f(a=1, b=2)`` share a key.
+
+        :param tuple args: Arguments passed to function.
+        :param dict kwargs: Keyword arguments passed to function.
+        :return: Arguments and keyword arguments.
+        :rtype: tuple
+        """
+
+        # Guard, nothing to bind, or every positional parameter passed by position
+        if self.binder is None or (not kwargs and self.arity is not None and len(args) >= self.arity):
+            return args, kwargs
+
+        return self.binder(args, kwargs)
+
+    def make_tags(self, tags, *args, **kwargs):
+        """
+        Tags of one call.
+
+        :param list tags: Tags passed with ``cache_tags``.
+        :param tuple args: Arguments passed to function.
+        :param dict kwargs: Keyword arguments passed to function.
+        :rtype: list
+        """
+        return list(tags)
+
+    @property
+    def prefix(self):
+        """Key prefix, namespace and version."""
+        return key_prefix(self.namespace, self.version)
+
+    def clear(self):
+        """
+        Invalidate every cached result in constant time.  Bumps the generation, orphaned keys expire on their own.
+
+        :return: New generation.
+        :rtype: int
+        """
+        return self.generation.bump(self.redis)
+
+    def stats(self):
+        """
+        Hits, misses, stores, skipped stores, busts, stored bytes and lookup, compute, store latencies.
+
+        :rtype: dict
+        """
+        return self.statistics.snapshot()
+
+    def invalidate(self, *tags):
+        """
+        Delete every entry stored with any of ``tags``.  Only tagged keys are touched.
+
+        :return: Number of entries deleted.
+        :rtype: int
+        """
+        start = monotonic()
+        keys = invalidate_tags(self.redis, self.prefix, tags)
+
+        if self.local_cache is not None:
+            for key in keys:
+                self.local_cache.pop(key)
+
+        self.evicted(keys, monotonic() - start)
+        return len(keys)
+
+    def compute_cache_results(self, key, func_akw, set_cache_cb, tags=()):
+        """Put function results into cache.  Hold the cross-process lock, if any."""
+
+        # Guard, no cross-process coordination
+        if self.lock is None:
+            return self.put_cache_results(key, func_akw, set_cache_cb, tags)
+
+        def compute():
+            return Entry.wrap(self.put_cache_results(key, func_akw, set_cache_cb, tags))
 
-        # Guard, don't get results from cache.
-        if bust_cache:
-            del self[hash_key]
-            return self.put_cache_results(hash_key, func_akw, set_cache_cb)
+        return self.lock.run(self.redis, key, compute, partial(self.get_entry, key)).value
 
-        # Results are in cache, use results
-        results_from_cache = self[hash_key]
-        if results_from_cache is not None:
-            return results_from_cache
+    def refresh_cache_results(self, key, func_akw, set_cache_cb, tags=(), stale=None):
+        """Put fresh function results into cache.  Skip if another process holds the lock."""
 
-        # Set and return results from cache
-        return self.put_cache_results(hash_key, func_akw, set_cache_cb)
+        # Guard, no cross-process coordination
+        if self.lock is None:
+            return self.put_cache_results(key, func_akw, set_cache_cb, tags, stale)
 
-    def put_cache_results(self, key, func_akw, set_cache_cb):
-        """Put function results into cache."""
-        args, kwargs = func_akw
+        token = self.lock.acquire(self.redis, key)
+
+        # Guard, another process is refreshing
+        if token is None:
+            return None
+
+        try:
+            return self.put_cache_results(key, func_akw, set_cache_cb, tags, stale)
+        finally:
+            self.lock.release(self.redis, key, token)
+
+    def put_cache_results(self, key, func_akw, set_cache_cb, tags=(), stale=None):
+        """Put function results into cache.  Revalidate ``stale`` results, if any."""
+        args, kwargs = self.conditional(func_akw, stale)
 
         # get function results
-        func_results = self.func(*args, **kwargs)
+        start = time()
+        func_results = self.revalidated(self.func(*args, **kwargs), stale)
+        delta = time() - start
+        self.statistics.observe('compute', delta)
 
         # optionally add results to cache
         if set_cache_cb(func_results):
-            self[key] = func_results
+            self.set_entry(key, func_results, delta, tags)
+        else:
+            self.statistics.incr('skipped_stores')
         return func_results
 
+    def conditional(self, func_akw, stale):
+        """
+        Function arguments to refresh ``stale`` results with.  Override to revalidate instead of recompute.
+
+        :param tuple func_akw: Function args and kwargs.
+        :param Entry stale: Expired entry.  ``None`` on a miss.
+        :rtype: tuple
+        """
+        return func_akw
+
+    def revalidated(self, results, stale):
+        """
+        Results to store, after a call made with :meth:`conditional` arguments.
+
+        :param results: Function results.
+        :param Entry stale: Expired entry.  ``None`` on a miss.
+        """
+        return results
+
     def __setitem__(self, key, value):
         """Store value in key."""
+        return self.set_entry(key, value)
+
+    def set_entry(self, key, value, delta=0, tags=()):
+        """
+        Store results and metadata.
+
+        :param str key: Cache key.
+        :param value: Function results.
+        :param float delta: Seconds it took to compute results.
+        :param list tags: Index the key under these tags.
+        """
 
         # Guard, no value
-        if value is None:
+        if value is None and not self.negative_ex:
             return None
 
+        timings = {'call': delta} if self.hooks.enabled else None
+        start = monotonic()
+        data, ex = self.dump_entry(key, value, delta, timings)
+        io_start = monotonic()
+
+        # untagged, skip the pipeline
+        if not tags:
+            stored = self.write(self.redis, key, data, ex, value)
+        else:
+            pipe = self.redis.pipeline(transaction=False)
+            self.write(pipe, key, data, ex, value)
+            index_tags(pipe, self.prefix, key, tags, self.index_ex)
+            stored = pipe.execute()[0]
+
+        end = monotonic()
+        self.statistics.observe('store', end - start)
+
+        if timings is not None:
+            timings['io'] = end - io_start
+            self.hooks.emit('on_store', key, self.func.__name__, timings)
+
+        return stored
+
+    def set_many(self, items):
+        """
+        Store many results in one pipeline.
+
+        :param list items: ``(key, value, delta, tags)`` tuples.
+        """
+
+        start = monotonic()
+        pipe = self.redis.pipeline(transaction=False)
+        events = []
+
+        for key, value, delta, tags in items:
+
+            # Guard, no value
+            if value is None and not self.negative_ex:
+                continue
+
+            timings = {'call': delta} if self.hooks.enabled else None
+            data, ex = self.dump_entry(key, value, delta, timings)
+            self.write(pipe, key, data, ex, value)
+            index_tags(pipe, self.prefix, key, tags, self.index_ex)
+
+            if timings is not None:
+                events.append((key, timings))
+
+        io_start = monotonic()
+        stored = pipe.execute()
+        end = monotonic()
+        self.statistics.observe('store', end - start)
+
+        # One round trip, shared by every entry
+        for key, timings in events:
+            timings['io'] = end - io_start
+            self.hooks.emit('on_store', key, self.func.__name__, timings)
+
+        return stored
+
+    def dump_entry(self, key, value, delta, timings=None):
+        """Serialize results and metadata, write through the local tier.  Return data and expiration."""
+
+        # Spread expiration of entries stored at the same time
+        ex = self.expiration(value)
+        if self.ex_jitter:
+            ex *= 1 - random() * self.ex_jitter
+
         # Serialize value
-        logger.info('Caching results for hash: %s ', key)
-        return self.redis.set(name=key, value=pickle.dumps(value), ex=self.ex)
+        start = monotonic()
+        retention = self.retention(value)
+        stored = self.encode(value)
+
+        # Expiration travels with the value.  Redis holds it past expiration, to serve stale or revalidate.
+        if retention or self.xfetch_beta:
+            value = Entry(value, time() + ex, delta)
+            stored = value._replace(value=stored)
+            ex += retention
+
+        if isinstance(value, Entry):
+            data = serializers.dumps(tuple(stored), self.serializer, serializers.FLAG_ENTRY, self.compressor)
+        else:
+            data = serializers.dumps(stored, self.serializer, compressor=self.compressor)
+
+        if timings is not None:
+            timings['serialize'] = monotonic() - start
+
+        self.statistics.incr('stores')
+        self.statistics.incr('stored_bytes', len(data))
+
+        # Write through local tier
+        if self.local_cache is not None:
+            self.local_cache.set(key, value, size=len(data), ex=ex)
+
+        return data, ex
+
+    def write(self, redis, key, data, ex, results=None):
+        """
+        Store data.  One command, on the connection or a pipeline.  Override with :meth:`read` to change the layout.
+
+        :param redis: Redis connection or pipeline.
+        :param str key: Cache key.
+        :param bytes data: Serialized results and metadata.
+        :param float ex: Expiration time in seconds.
+        :param results: Function results, as computed.
+        """
+        return redis.set(name=key, value=data, px=max(1, int(ex * 1000)))
+
+    def read(self, key):
+        """Stored data of key, see :meth:`write`.  ``None`` if missing."""
+        return self.redis.get(key)
+
+    def read_many(self, keys):
+        """Stored data of many keys, in one round trip."""
+        return self.redis.mget(keys)
+
+    def read_ttl(self, keys):
+        """
+        Stored data of many keys and the seconds redis keeps each, in one round trip.  Caps the local tier.
+
+        :param list keys: Cache keys.
+        :return: Data and seconds per key.  Seconds are ``None`` without an expiration.
+        :rtype: list
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        for key in keys:
+            self.queue_read(pipe, key)
+            pipe.pttl(key)
+
+        values = pipe.execute(raise_on_error=False)
+
+        # Failed reads are retried on their own, see :meth:`read`
+        return [(self.read(key) if isinstance(value, ResponseError) else value, ttl / 1000.0 if ttl >= 0 else None)
+                for key, value, ttl in zip(keys, values[::2], values[1::2])]
+
+    def queue_read(self, pipe, key):
+        """Queue the read of one key on a pipeline, see :meth:`read`."""
+        pipe.get(key)
+
+    def encode(self, results):
+        """Storable form of results.  Override to store a compact record instead, see :meth:`decode`."""
+        return results
+
+    def decode(self, value, key):
+        """Results from their stored form, see :meth:`encode`."""
+        return value
+
+    def expiration(self, results):
+        """Expiration time in seconds.  Negative results use ``negative_ex``."""
+        return self.negative_ex if self.negative_ex and is_negative(results) else self.ex
+
+    def retention(self, results):
+        """Seconds redis keeps results past expiration.  ``stale_ex``."""
+        return self.stale_ex or 0
+
+    @property
+    def index_ex(self):
+        """Tag index expiration time in seconds.  Outlives every entry."""
+        return max(self.ex, self.negative_ex or 0) + (self.stale_ex or 0)
 
     def __getitem__(self, key):
         """Get results from cache."""
-        # setup, get key from cache
-        value = self.redis.get(key)
+        entry = self.get_entry(key)
+        return None if entry is None else entry.value
+
+    def get_entry(self, key, timings=None):
+        """
+        Get results and metadata from cache.
+
+        :param str key: Cache key.
+        :param dict timings: Record ``io`` and ``deserialize`` seconds.
+        """
+        # Local tier first, skip the round trip
+        if self.local_cache is not None:
+            value = self.local_cache.get(key, MISSING)
+            if value is not MISSING:
+                return Entry.wrap(value)
+
+        start = monotonic()
+        if self.local_cache is None:
+            value, ttl = self.read(key), None
+        else:
+            (value, ttl), = self.read_ttl([key])
+
+        if timings is not None:
+            timings['io'] = monotonic() - start
+        return self.load_entry(key, value, timings, ttl)
+
+    def get_many(self, keys, timings=None):
+        """
+        Get results and metadata for many keys.  One round trip for keys missing from the local tier.
+
+        :param list keys: Cache keys.
+        :param dict timings: Record ``io`` and ``deserialize`` seconds, for the batch.
+        :return: Entries found, by key.
+        :rtype: dict
+        """
+
+        entries = {}
+        keys = list(OrderedDict.fromkeys(keys))
+
+        # Local tier first, skip the round trip
+        if self.local_cache is not None:
+            for key in keys:
+                value = self.local_cache.get(key, MISSING)
+                if value is not MISSING:
+                    entries[key] = Entry.wrap(value)
+
+            keys = [key for key in keys if key not in entries]
+
+        # Guard, all local
+        if not keys:
+            return entries
+
+        start = monotonic()
+        if self.local_cache is None:
+            values = [(value, None) for value in self.read_many(keys)]
+        else:
+            values = self.read_ttl(keys)
+
+        if timings is not None:
+            timings['io'] = monotonic() - start
+
+        for key, (value, ttl) in zip(keys, values):
+            entry = self.load_entry(key, value, timings, ttl)
+            if entry is not None:
+                entries[key] = entry
+
+        return entries
+
+    def load_entry(self, key, value, timings=None, ttl=None):
+        """
+        Deserialize results and metadata, fill the local tier.
+
+        :param str key: Cache key.
+        :param bytes value: Stored data.
+        :param dict timings: Add ``deserialize`` seconds.
+        :param float ttl: Seconds redis keeps the key.  Local copies expire no later.
+        """
 
         # Guard, no value, don't try to deserialize
         if not value:
-            return value
+            return None
 
         # deserialize value
-        logger.debug('Retrieving item from cache: %s', key)
-        return pickle.loads(value)
+        start = monotonic()
+        results, flags = serializers.loads(value)
+        if flags & serializers.FLAG_ENTRY:
+            results = Entry(*results)
+            results = results._replace(value=self.decode(results.value, key))
+        else:
+            results = self.decode(results, key)
+        entry = Entry.wrap(results)
+
+        if timings is not None:
+            timings['deserialize'] = timings.get('deserialize', 0.0) + monotonic() - start
+
+        if self.local_cache is not None:
+            if entry.expires is None:
+                ex = self.expiration(entry.value)
+            else:
+                ex = entry.expires - time() + self.retention(entry.value)
+            if ttl is not None:
+                ex = min(ex, ttl)
+            self.local_cache.set(key, results, size=len(value), ex=ex)
+
+        return entry
 
     def __delitem__(self, key):
         """Delete item from cache"""
-        return self.redis.delete(key)
+        if self.local_cache is not None:
+            self.local_cache.pop(key)
+
+        start = monotonic()
+        deleted = self.redis.delete(key)
+        self.evicted([key], monotonic() - start)
+        return deleted
+
+    def delete_many(self, keys):
+        """Delete many items from cache"""
+
+        # Guard, DEL takes at least one key
+        if not keys:
+            return 0
+
+        if self.local_cache is not None:
+            for key in keys:
+                self.local_cache.pop(key)
+
+        start = monotonic()
+        deleted = self.redis.delete(*keys)
+        self.evicted(keys, monotonic() - start)
+        return deleted
+
+    def evicted(self, keys, io):
+        """Emit ``on_evict`` per key.  ``io`` is shared by every key deleted in the same round trip."""
+
+        # Guard, no callbacks
+        if not self.hooks.enabled:
+            return
+
+        for key in keys:
+            self.hooks.emit('on_evict', key, self.func.__name__, {'io': io})
 
     def __get__(self, instance, _):  # pragma: no cover
 
@@ -152,3 +779,224 @@ class Memoize(object):
     @redis.setter
     def redis(self, value):
         self.connection = value
+
+
+def canonical_signature(func, ignore=()):
+    """
+    Binder of arguments, and the number of positional parameters that makes binding a no-op.
+
+    :param function func: Decorated function.
+    :param frozenset ignore: Parameter names left out of the cache key.
+    :return: :class:`Binder`, ``None`` if binding never changes arguments.  Arity, ``None`` if binding always may.
+    :rtype: tuple
+    """
+
+    try:
+        sig = signature(func)
+    except (TypeError, ValueError):  # builtins, Python 2
+        if ignore:
+            raise ValueError('ignore requires a function signature, %r has none.' % func)
+        return None, None
+
+    parameters = list(sig.parameters.values())
+
+    unknown = ignore.difference(parameter.name for parameter in parameters)
+    if unknown:
+        raise ValueError('Unknown parameters in ignore: %s' % ', '.join(sorted(unknown)))
+
+    variadic = (Parameter.VAR_POSITIONAL, Parameter.VAR_KEYWORD)
+    positional = (Parameter.POSITIONAL_ONLY, Parameter.POSITIONAL_OR_KEYWORD)
+
+    # Guard, only *args, **kwargs and required positional only parameters: arguments are already canonical
+    if not ignore and all(parameter.kind in variadic or (
+            parameter.kind == Parameter.POSITIONAL_ONLY and parameter.default is Parameter.empty)
+            for parameter in parameters):
+        return None, None
+
+    arity = len([parameter for parameter in parameters if parameter.kind in positional])
+    keyword_only = any(parameter.kind == Parameter.KEYWORD_ONLY for parameter in parameters)
+
+    return Binder(sig, ignore), None if ignore or keyword_only else arity
+
+
+class Binder(object):
+    """
+    Bind arguments to a signature, see :meth:`Memoize.bind`.  Names, defaults and the bound layout are looked up at
+    decoration time.  ``Signature.bind`` runs for signatures with ``*args`` or ``**kwargs`` only.
+    """
+
+    def __init__(self, sig, ignore=frozenset()):
+        """
+        :param inspect.Signature sig: Function signature.
+        :param frozenset ignore: Parameter names left out of the bound arguments.
+        """
+        parameters = list(sig.parameters.values())
+        positional = (Parameter.POSITIONAL_ONLY, Parameter.POSITIONAL_OR_KEYWORD)
+
+        self.signature = sig
+        self.ignore = ignore
+        self.variadic = any(parameter.kind in (Parameter.VAR_POSITIONAL, Parameter.VAR_KEYWORD)
+                            for parameter in parameters)
+
+        # Lookups
+        self.names = [parameter.name for parameter in parameters if parameter.kind in positional]
+        self.positions = dict((name, position) for position, name in enumerate(self.names))
+        self.keywords = frozenset(parameter.name for parameter in parameters
+                                  if parameter.kind != Parameter.POSITIONAL_ONLY)
+        self.defaults = dict((parameter.name, parameter.default) for parameter in parameters
+                             if parameter.default is not Parameter.empty)
+        self.size = len(parameters)
+
+        # Layout, as Signature.bind: by position up to the first ignored or keyword only parameter, by keyword after
+        split = next((index for index, parameter in enumerate(parameters)
+                      if parameter.name in ignore or parameter.kind not in positional), len(parameters))
+        self.args = [parameter.name for parameter in parameters[:split]]
+        self.kwargs = [parameter.name for parameter in parameters[split:] if parameter.name not in ignore]
+
+    def __call__(self, args, kwargs):
+        """
+        Bound arguments: positional where possible, defaults filled in and ``ignore`` parameters left out.  Arguments
+        the function rejects are returned as they are, the function raises.
+
+        :param tuple args: Arguments passed to function.
+        :param dict kwargs: Keyword arguments passed to function.
+        :return: Arguments and keyword arguments.
+        :rtype: tuple
+        """
+
+        # Guard, *args or **kwargs
+        if self.variadic:
+            return self.bind_signature(args, kwargs)
+
+        # Guard, too many arguments
+        if len(args) > len(self.names):
+            return args, kwargs
+
+        arguments = dict(self.defaults)
+        arguments.update(zip(self.names, args))
+
+        for name, value in kwargs.items():
+
+            # Guard, unknown, positional only, or passed by position too
+            if name not in self.keywords or self.positions.get(name, len(args)) < len(args):
+                return args, kwargs
+            arguments[name] = value
+
+        # Guard, missing arguments
+        if len(arguments) < self.size:
+            return args, kwargs
+
+        return tuple([arguments[name] for name in self.args]), dict((name, arguments[name]) for name in self.kwargs)
+
+    def bind_signature(self, args, kwargs):
+        """Bound arguments, through ``Signature.bind``.  See :meth:`__call__`."""
+        try:
+            bound = self.signature.bind(*args, **kwargs)
+        except TypeError:  # the function raises it
+            return args, kwargs
+
+        arguments = bound.arguments
+        for name, parameter in self.signature.parameters.items():
+            if name in self.ignore:
+                arguments.pop(name, None)
+            elif name not in arguments and parameter.default is not parameter.empty:
+                arguments[name] = parameter.default
+
+        return bound.args, bound.kwargs
+
+
+def key_prefix(namespace, version=None):
+    """Key prefix, namespace and version."""
+    return namespace if version is None else '%s:v%s' % (namespace, version)
+
+
+MISSING = object()
+"""Sentinel, key is not in the local tier."""
+
+
+def is_negative(results):
+    """``None``, empty and falsy results.  Objects without a truth value are not negative."""
+    try:
+        return not results
+    except Exception:  # catch all, e.g. numpy arrays refuse to be truthy.
+        return False
+
+
+def unpack_args(args):
+    """Positional arguments for one call in a batch.  Tuples are unpacked, anything else is one argument."""
+    return args if isinstance(args, tuple) else (args,)
+
+
+class Generation(object):
+    """
+    Generation counter, part of every key.  Bumping it orphans every key in the namespace at once.
+
+    The counter lives in redis, shared by every process.  Reads are cached in-process for ``ttl`` seconds.
+    """
+
+    def __init__(self, key, ttl=1.0):
+        """
+        :param str key: Counter key.
+        :param float ttl: Seconds to trust the cached value.  Other processes see a bump within ``ttl``.
+        """
+
+        self.key = key
+        self.ttl = ttl
+        self.value = 0
+        self.checked = None
+
+    def get(self, redis):
+        """Current generation."""
+        if self.expired():
+            self.refresh(redis)
+        return self.value
+
+    def expired(self):
+        """Cached value needs a refresh."""
+        return self.checked is None or monotonic() - self.checked >= self.ttl
+
+    def refresh(self, redis):
+        """Read the counter."""
+        self.value = int(redis.get(self.key) or 0)
+        self.checked = monotonic()
+        return self.value
+
+    def bump(self, redis):
+        """Increment the counter."""
+        self.value = redis.incr(self.key)
+        self.checked = monotonic()
+        return self.value
+
+
+class Entry(namedtuple('Entry', 'value expires delta')):
+    """
+    Cached results with metadata.  Stored as is in stale-while-revalidate and early refresh modes.
+
+    :param value: Function results.
+    :param float expires: Expiration, a unix timestamp.  Soft expiration in stale-while-revalidate mode.
+    :param float delta: Seconds it took to compute results.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def wrap(cls, results):
+        """Plain results never go stale."""
+        return results if isinstance(results, cls) else cls(results, None, 0)
+
+    def is_stale(self, beta=None):
+        """
+        Check expiration.  With ``beta``, expire early with rising probability as expiration nears (XFetch).
+
+        :param float beta: Early expiration factor.  Larger values refresh earlier.
+        """
+
+        # Guard, never expires
+        if self.expires is None:
+            return False
+
+        now = time()
+        if beta:
+            now -= self.delta * beta * log(1 - random())
+
+        return self.expires <= now
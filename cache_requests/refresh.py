@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+:mod:`cache_requests.refresh`
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+.. moduleauthor:: Manu Phatak <bionikspoon@gmail.com>
+
+Refresh stale cache entries in the background.
+
+Private API
+***********
+    * :class:`Refresher`
+
+Source
+******
+"""
+from __future__ import absolute_import
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+__all__ = ['Refresher']
+
+
+class Refresher(object):
+    """Background thread pool.  At most one pending refresh per key."""
+
+    def __init__(self, max_workers=4):
+        """:param int max_workers: Maximum number of refresh threads."""
+
+        self.max_workers = max_workers
+        self.executor = None
+        self._lock = Lock()
+        self._pending = set()
+
+    def submit(self, key, func, *args, **kwargs):
+        """
+        Schedule ``func`` to refresh ``key``.
+
+        :return: ``False`` if a refresh for ``key`` is already pending.
+        :rtype: bool
+        """
+
+        with self._lock:
+            # Guard, already refreshing
+            if key in self._pending:
+                return False
+
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+            self._pending.add(key)
+
+        self.executor.submit(self._run, key, func, args, kwargs)
+        return True
+
+    def shutdown(self, wait=True):
+        """Stop worker threads.  The pool restarts on the next submit."""
+
+        with self._lock:
+            executor, self.executor = self.executor, None
+
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _run(self, key, func, args, kwargs):
+        try:
+            return func(*args, **kwargs)
+        except Exception:  # catch all, stale results stay in place until they expire.
+            logger.exception('Refreshing results failed for hash: %s', key)
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def __len__(self):
+        return len(self._pending)
@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+:mod:`cache_requests.responses`
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+.. moduleauthor:: Manu Phatak <bionikspoon@gmail.com>
+
+Compact response storage.  Responses are stored as plain records, without the prepared request, cookie jar or
+adapter state, and rebuilt on read.  Records hold only strings, numbers, bytes and tuples.  Serializers without
+bytes, e.g. JSON, store bodies as base64 text.
+
+Large bodies may be stored apart from the record, in redis or on disk.  Their responses read the body on first access.
+The record holds the digest of its body, so a body replaced since the record was read is never paired with it.
+
+Private API
+***********
+    * :func:`dump_response`
+    * :func:`load_response`
+    * :func:`is_record`
+    * :func:`dump_content`
+    * :func:`load_content`
+    * :func:`body_digest`
+    * :class:`LazyResponse`
+
+Source
+******
+"""
+from __future__ import absolute_import
+
+from base64 import b64decode, b64encode
+from datetime import timedelta
+from functools import partial
+from hashlib import sha256
+
+from requests import PreparedRequest, Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import iter_slices, stream_decode_response_unicode
+from six import text_type
+
+__all__ = ['dump_response', 'load_response', 'is_record', 'dump_content', 'load_content', 'body_digest',
+           'LazyResponse']
+
+MARKER = 'cache_requests.response:2'
+"""First field of every record.  Bump the version with the layout."""
+
+FIELDS = ('marker', 'status_code', 'url', 'reason', 'headers', 'encoding', 'content', 'elapsed', 'history', 'method',
+          'request_url', 'digest')
+"""
+Record layout.  Headers are ``(name, value)`` pairs, elapsed is in seconds, history holds records.  Content is
+``False`` for bodies stored apart, base64 text for serializers without bytes.  Digest is the SHA-256 of a body stored
+apart, ``None`` otherwise.
+"""
+
+
+def dump_response(response, digest=None, binary=True):
+    """
+    Compact record of a response.  A plain tuple, see :data:`FIELDS`.
+
+    :param requests.Response response: Response.
+    :param str digest: Body digest, see :func:`body_digest`.  The caller stores the body apart.  ``None`` keeps the
+        body in the record.
+    :param bool binary: Serializer holds bytes, see :attr:`Serializer.binary`.  Otherwise bodies are base64 text.
+    :rtype: tuple
+    """
+
+    request = response.request
+    return (
+        MARKER,
+        response.status_code,
+        response.url,
+        response.reason,
+        tuple(response.headers.items()),
+        response.encoding,
+        dump_content(response.content, binary) if digest is None else False,
+        response.elapsed.total_seconds(),
+        tuple(dump_response(redirect, binary=binary) for redirect in response.history),
+        getattr(request, 'method', None),
+        getattr(request, 'url', None),
+        digest,
+    )
+
+
+def load_response(record, load_body=None):
+    """
+    Rebuild a response from its record.
+
+    :param tuple record: Record, or a list of its fields.
+    :param function load_body: Return the body stored apart, called with its digest.  Called on first access.
+    :rtype: requests.Response
+    """
+
+    _, status_code, url, reason, headers, encoding, content, elapsed, history, method, request_url, digest = record
+
+    request = PreparedRequest()
+    request.method = method
+    request.url = request_url
+    request.headers = CaseInsensitiveDict()
+
+    # Body stored apart, read on first access
+    if content is False and load_body is not None:
+        response = LazyResponse(partial(load_body, digest))
+    else:
+        response = Response()
+
+    response.status_code = status_code
+    response.url = url
+    response.reason = reason
+    response.headers = CaseInsensitiveDict(headers)
+    response.encoding = encoding
+    response._content = load_content(content)
+    response._content_consumed = True
+    response.elapsed = timedelta(seconds=elapsed)
+    response.history = [load_response(redirect) for redirect in history]
+    response.request = request
+    return response
+
+
+def is_record(value):
+    """Stored value is a response record.  Serializers without tuples return records as lists."""
+    return isinstance(value, (tuple, list)) and len(value) == len(FIELDS) and value[0] == MARKER
+
+
+def dump_content(content, binary=True):
+    """Body as stored.  Base64 text for serializers without bytes."""
+    return content if binary or not isinstance(content, bytes) else b64encode(content).decode('ascii')
+
+
+def load_content(content):
+    """Body from its stored form, see :func:`dump_content`."""
+    return b64decode(content) if isinstance(content, text_type) else content
+
+
+def body_digest(response):
+    """SHA-256 hex digest of the body.  Computed once per response."""
+    digest = response.__dict__.get('_body_digest')
+    if digest is None:
+        digest = response._body_digest = sha256(response.content).hexdigest()
+    return digest
+
+
+class LazyResponse(Response):
+    """
+    Response whose body is stored apart from its record.  Read on first access of ``content``, ``text``, etc.
+
+    Bodies spilled to disk are memory mapped.  ``content``, ``text`` and ``json()`` copy the body out of the map and
+    close it, ``body`` and ``iter_content`` read the map in place.  Close the response to release the map.
+    """
+
+    def __init__(self, load_body, reload=None):
+        """
+        :param function load_body: Return the body, bytes or a memory map of a body spilled to disk.
+            Raise :class:`LookupError` if it is no longer cached.
+        :param function reload: Send the request again.  Called if the body is no longer cached.
+        """
+        super(LazyResponse, self).__init__()
+        self.load_body = load_body
+        self.reload = reload
+        self._body = None
+
+    @property
+    def body(self):
+        """
+        Body as stored, read once.  Memory mapped bodies are read without copies, e.g. ``memoryview(body)``, until the
+        response is closed.  Mapped again on the next access.
+        """
+        if self._body is None:
+            try:
+                self._body = self.load_body()
+            except LookupError:
+                if self.reload is None:
+                    raise
+                self.replace(self.reload())
+        return self._body
+
+    def replace(self, response):
+        """Take the status, headers and body of a fresh response.  The stored body is gone."""
+        response.content  # noqa, read before copying
+        for name in Response.__attrs__:
+            setattr(self, name, getattr(response, name))
+        self._body = self._content
+
+    @property
+    def content(self):
+        """Body, read once.  Memory mapped bodies are copied, and the map is closed."""
+        if self._content is False:
+            body = self.body
+            if isinstance(body, bytes):
+                self._content = body
+            else:
+                self._content = body[:]
+                self.close()
+        return self._content
+
+    def close(self):
+        """Release the memory map of a body spilled to disk, if any.  Maps still viewed are released by their views."""
+        body, self._body = self._body, None if self._content is False else self._content
+
+        if body is not None and not isinstance(body, bytes):
+            try:
+                body.close()
+            except BufferError:  # exported views, e.g. memoryview(body), keep the map open
+                pass
+
+        super(LazyResponse, self).close()
+
+    def iter_content(self, chunk_size=1, decode_unicode=False):
+        """Iterate over the body, read once.  Memory mapped bodies are iterated without reading them whole."""
+
+        # Guard, bytes
+        if self._content is not False or isinstance(self.body, bytes):
+            self.content  # noqa, read before iterating
+            return super(LazyResponse, self).iter_content(chunk_size, decode_unicode)
+
+        chunks = iter_slices(self.body, chunk_size)
+        return stream_decode_response_unicode(chunks, self) if decode_unicode else chunks
+
+    def __getstate__(self):
+        self.content  # noqa, pickle the body too
+        return super(LazyResponse, self).__getstate__()
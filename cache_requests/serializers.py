@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+:mod:`cache_requests.serializers`
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+.. moduleauthor:: Manu Phatak <bionikspoon@gmail.com>
+
+Pluggable serializers.  Stored values carry a small header naming their serializer, so values stored with any
+serializer can be read back, whatever the current setting.
+
+Header layout, 3 bytes: ``MAGIC``, serializer code, flags.  The high 4 bits of flags hold the compressor code.
+
+Public Api
+**********
+    * :class:`PickleSerializer`
+    * :class:`MarshalSerializer`
+    * :class:`JSONSerializer`
+    * :class:`MsgpackSerializer`
+
+Private API
+***********
+    * :func:`get_serializer`
+    * :func:`dumps`
+    * :func:`loads`
+
+Source
+******
+"""
+from __future__ import absolute_import
+
+import json
+import marshal
+import struct
+
+from ._compat import pickle
+from .compression import compressors
+
+__all__ = ['Serializer', 'PickleSerializer', 'MarshalSerializer', 'JSONSerializer', 'MsgpackSerializer',
+           'get_serializer', 'dumps', 'loads', 'FLAG_ENTRY', 'FLAG_NONE']
+
+MAGIC = 0xCA
+HEADER = struct.Struct('>BBB')
+
+FLAG_ENTRY = 0x01
+"""Payload is an ``(value, expires, delta)`` envelope."""
+
+FLAG_NONE = 0x02
+"""Sentinel for ``None``.  No payload, whatever the serializer."""
+
+FLAGS_MASK = 0x0F
+COMPRESSOR_SHIFT = 4
+
+
+class Serializer(object):
+    """Serializer interface."""
+
+    name = None
+    """Name used to select the serializer."""
+
+    code = None
+    """Unique id, stored in the value header.  Never reuse a code."""
+
+    binary = True
+    """Stores bytes as bytes.  Sessions store response bodies as base64 text otherwise."""
+
+    def dumps(self, value):
+        raise NotImplementedError
+
+    def loads(self, data):
+        raise NotImplementedError
+
+    def __repr__(self):
+        return '%s()' % self.__class__.__name__
+
+
+class PickleSerializer(Serializer):
+    """Any picklable object.  Highest protocol by default."""
+
+    name = 'pickle'
+    code = 1
+
+    def __init__(self, protocol=pickle.HIGHEST_PROTOCOL):
+        self.protocol = protocol
+
+    def dumps(self, value):
+        return pickle.dumps(value, self.protocol)
+
+    def loads(self, data):
+        return pickle.loads(data)
+
+
+class MarshalSerializer(Serializer):
+    """
+    Primitive data only: numbers, strings, bytes, tuples, lists, sets and dicts.
+
+    Fast, but the format may change between Python versions.
+    """
+
+    name = 'marshal'
+    code = 2
+
+    def dumps(self, value):
+        return marshal.dumps(value)
+
+    def loads(self, data):
+        return marshal.loads(data)
+
+
+class JSONSerializer(Serializer):
+    """JSON data.  Tuples come back as lists, bytes are not supported."""
+
+    name = 'json'
+    code = 3
+    binary = False
+
+    def dumps(self, value):
+        return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, data):
+        return json.loads(data.decode('utf-8'))
+
+
+class MsgpackSerializer(Serializer):
+    """Msgpack data.  Tuples come back as lists.  Requires :mod:`msgpack`."""
+
+    name = 'msgpack'
+    code = 4
+
+    def dumps(self, value):
+        return self.msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, data):
+        return self.msgpack.unpackb(data, raw=False)
+
+    @property
+    def msgpack(self):
+        try:
+            import msgpack
+        except ImportError:
+            raise ImportError('MsgpackSerializer requires msgpack.  Install it with `pip install msgpack`.')
+        return msgpack
+
+
+serializers = dict((serializer.code, serializer) for serializer in (
+    PickleSerializer(), MarshalSerializer(), JSONSerializer(), MsgpackSerializer()))
+"""Default instance per code.  Used to read values, whatever serializer stored them."""
+
+
+def get_serializer(serializer=None):
+    """
+    Resolve serializer setting.
+
+    :param str|Serializer serializer: Serializer instance or name.  Defaults to ``'pickle'``.
+    :rtype: Serializer
+    """
+
+    if serializer is None:
+        serializer = PickleSerializer.name
+
+    # Guard, already a serializer.  Custom serializers are registered to read their values back.
+    if isinstance(serializer, Serializer):
+        serializers.setdefault(serializer.code, serializer)
+        return serializer
+
+    for instance in serializers.values():
+        if instance.name == serializer:
+            return instance
+
+    names = ', '.join(sorted(instance.name for instance in serializers.values()))
+    raise ValueError('Unknown serializer %r.  Serializers: %s' % (serializer, names))
+
+
+def dumps(value, serializer, flags=0, compressor=None):
+    """
+    Serialize value, prefix header.
+
+    :param value: Value to serialize.
+    :param Serializer serializer: Serializer.
+    :param int flags: Header flags.
+    :param Compressor compressor: Compress payloads of at least ``compressor.threshold`` bytes.
+    :rtype: bytes
+    """
+
+    # Guard, sentinel
+    if value is None:
+        return HEADER.pack(MAGIC, serializer.code, flags | FLAG_NONE)
+
+    payload = serializer.dumps(value)
+
+    if compressor is not None and len(payload) >= compressor.threshold:
+        compressed = compressor.compress(payload)
+
+        # Guard, incompressible
+        if len(compressed) < len(payload):
+            payload = compressed
+            flags |= compressor.code << COMPRESSOR_SHIFT
+
+    return HEADER.pack(MAGIC, serializer.code, flags) + payload
+
+
+def loads(data):
+    """
+    Read header, decompress and deserialize value with the compressor and serializer that stored it.
+
+    :return: Value and header flags.
+    :rtype: tuple
+    """
+
+    magic, code, flags = HEADER.unpack_from(data) if len(data) >= HEADER.size else (None, None, 0)
+
+    # Guard, headerless value from an older release.
+    if magic != MAGIC or code not in serializers:
+        return pickle.loads(data), 0
+
+    # Guard, sentinel
+    if flags & FLAG_NONE:
+        return None, flags & FLAGS_MASK
+
+    payload = data[HEADER.size:]
+
+    compressor_code = flags >> COMPRESSOR_SHIFT
+    if compressor_code:
+        payload = compressors[compressor_code].decompress(payload)
+
+    return serializers[code].loads(payload), flags & FLAGS_MASK
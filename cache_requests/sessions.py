@@ -23,17 +23,68 @@ Source
 """
 from __future__ import absolute_import
 
-from requests import Session as RequestsSession, HTTPError
-
-from .memoize import Memoize
+from functools import partial
+
+from redis import ResponseError
+from requests import Session as RequestsSession, HTTPError, Response
+
+from . import serializers
+from .bodies import DiskBodies, default_dir
+from ._compat import monotonic
+from .cache_control import HTTPCachePolicy, conditional_headers, refresh_response
+from .hooks import Hooks
+from .memoize import Memoize, key_prefix, unpack_args
+from .responses import LazyResponse, body_digest, dump_content, dump_response, is_record, load_content, load_response
+from .tags import host_tag, invalidate_tags, prefix_tag, url_tags
 from .utils import AttributeDict, default_connection, default_ex
 
 __all__ = ['MemoizeRequest', 'CacheConfig', 'Session']
 
+MIN_EX = 0.001
+"""Shortest expiration redis takes, in seconds."""
+
+META = 'meta'
+"""Hash field of the serialized record and metadata."""
+
+BODY = 'body'
+"""Hash field of a body stored apart from its record."""
+
+DIGEST = 'digest'
+"""Hash field of the digest of the ``body`` field.  Matched against the record's digest on read."""
+
+FILE = 'file'
+"""Hash field of the digest of a body spilled to disk."""
+
+CALL_OPTIONS = ('bust_cache', 'set_cache', 'cache_tags')
+"""Keyword arguments of :class:`Memoize` calls, not sent with requests."""
+
+WRITE_SCRIPT = """
+redis.call('del', KEYS[1])
+redis.call('hset', KEYS[1], unpack(ARGV, 2))
+return redis.call('pexpire', KEYS[1], ARGV[1])
+"""
+"""Replace a hash and set its expiration, in one command."""
+
+
+def cache_option(name):
+    """Proxy a :class:`Memoize` option to the shared session :class:`CacheConfig`."""
+
+    def getter(self):
+        return self.cache[name]
+
+    def setter(self, value):
+        self.cache[name] = value
+
+    return property(getter, setter)
+
 
 class MemoizeRequest(Memoize):
     """Cache session method calls."""
 
+    shared_options = ('ex', 'connection', 'local_cache', 'single_flight', 'lock', 'stale_ex', 'xfetch_beta',
+                      'ex_jitter', 'serializer', 'compressor', 'negative_ex', 'namespace', 'version', 'hooks')
+    """:class:`Memoize` options set from :class:`CacheConfig`."""
+
     def __init__(self, func=None, **kwargs):
 
         # setup shared cache
@@ -41,8 +92,8 @@ class MemoizeRequest(Memoize):
         self.cache = session.cache
 
         # set from shared cache defaults
-        kwargs.setdefault('ex', self.cache.ex)
-        kwargs.setdefault('connection', self.cache.connection)
+        for option in self.shared_options:
+            kwargs.setdefault(option, self.cache[option])
 
         super(MemoizeRequest, self).__init__(func=func, **kwargs)
 
@@ -60,42 +111,327 @@ class MemoizeRequest(Memoize):
             return self.func(*args, **kwargs)
 
         # Don't cache errors.
-        kwargs.setdefault('set_cache', self.cache.set_cache_cb)
+        kwargs.setdefault('set_cache', self.cacheable)
 
-        return super(MemoizeRequest, self).__call__(*args, **kwargs)
+        response = super(MemoizeRequest, self).__call__(*args, **kwargs)
+        return self.reloadable(response, args, kwargs)
 
-    @property
-    def use_cache(self):
-        all_is_unset = self.cache.all is None
-        return getattr(self.cache, self.func.__name__) if all_is_unset else self.cache.all
+    def many(self, args_list, **kwargs):
+        """
+        Batch call decorated function.  See :meth:`Memoize.many`.
+
+        :param list args_list: Function args per call.
+        :param dict kwargs: Function kwargs, passed to every call.
+        :return: Function results, in input order.
+        """
+        # Guard, don't cache method.
+        if not self.use_cache:
+            return [self.func(*unpack_args(args), **kwargs) for args in args_list]
+
+        # Don't cache errors.
+        kwargs.setdefault('set_cache', self.cacheable)
+
+        args_list = list(args_list)
+        responses = super(MemoizeRequest, self).many(args_list, **kwargs)
+        return [self.reloadable(response, unpack_args(args), kwargs) for response, args in zip(responses, args_list)]
+
+    def reloadable(self, response, args, kwargs):
+        """Send the request again if the body of a cached response is no longer cached.  See :class:`LazyResponse`."""
+
+        # Guard, body in the response
+        if not isinstance(response, LazyResponse) or response.reload is not None:
+            return response
+
+        kwargs = dict((name, value) for name, value in kwargs.items() if name not in CALL_OPTIONS)
+        response.reload = partial(self.func, *args, **kwargs)
+        return response
+
+    def make_tags(self, tags, *args, **kwargs):
+        """Tags of one request.  Host and path prefix tags, if ``index_urls`` is set."""
+        tags = super(MemoizeRequest, self).make_tags(tags, *args, **kwargs)
+        url = args[0] if args else kwargs.get('url')
+
+        if self.cache.index_urls and url:
+            tags.extend(url_tags(url))
+
+        return tags
+
+    def cacheable(self, response):
+        """Store response?  Per the HTTP caching policy if set, else ``set_cache_cb``."""
+
+        # Guard, status check only
+        if self.cache.http_cache is None:
+            return self.cache.set_cache_cb(response)
+
+        return self.cache.http_cache.ttl(response, self.ex) is not None
+
+    def expiration(self, results):
+        """Expiration time in seconds.  Per the HTTP caching policy if set, capped by ``ex``."""
+
+        # Guard, one expiration for every response
+        if self.cache.http_cache is None or results is None:
+            return super(MemoizeRequest, self).expiration(results)
+
+        # Expired since it was found cacheable, keep it the shortest time possible
+        return self.cache.http_cache.ttl(results, self.ex) or MIN_EX
+
+    def encode(self, results):
+        """Store responses as compact records.  The request, cookie jar and adapter are left out."""
+        if isinstance(results, Response):
+            digest = body_digest(results) if self.lazy(results) else None
+            return dump_response(results, digest, self.serializer.binary)
+        return results
+
+    def decode(self, value, key):
+        """Rebuild responses from records.  Responses pickled by older releases are read as is."""
+        return load_response(value, partial(self.load_body, key)) if is_record(value) else value
+
+    def lazy(self, response):
+        """Store the body apart?  Bodies of at least ``lazy_body`` bytes, or spilled to disk."""
+        return exceeds(response, self.cache.lazy_body) or self.spills(response)
+
+    def spills(self, response):
+        """Spill the body to disk?  Bodies of at least ``spill_body`` bytes."""
+        return exceeds(response, self.cache.spill_body)
+
+    def write(self, redis, key, data, ex, results=None):
+        """Store a hash.  Metadata reads fetch the ``meta`` field only, large bodies wait in the ``body`` field."""
+        fields = [META, data]
+
+        if isinstance(results, Response) and self.spills(results):
+            fields.extend([FILE, self.cache.bodies.put(results.content, body_digest(results))])
+        elif isinstance(results, Response) and self.lazy(results):
+            content = dump_content(results.content, self.serializer.binary)
+            body = serializers.dumps(content, self.serializer, compressor=self.compressor)
+            self.statistics.incr('stored_bytes', len(body))
+            fields.extend([BODY, body, DIGEST, body_digest(results)])
+
+        return redis.eval(WRITE_SCRIPT, 1, key, max(1, int(ex * 1000)), *fields)
+
+    def read(self, key):
+        """Record and metadata, without the body."""
+        try:
+            return self.redis.hget(key, META)
+        except ResponseError:  # Not a hash, stored by an older release.
+            return self.redis.get(key)
+
+    def read_many(self, keys):
+        """Records and metadata of many keys, in one round trip."""
+        pipe = self.redis.pipeline(transaction=False)
+        for key in keys:
+            self.queue_read(pipe, key)
+
+        values = pipe.execute(raise_on_error=False)
+        return [self.redis.get(key) if isinstance(value, ResponseError) else value for key, value in zip(keys, values)]
+
+    def queue_read(self, pipe, key):
+        """Queue the record read of one key on a pipeline, see :meth:`read`."""
+        pipe.hget(key, META)
+
+    def load_body(self, key, digest):
+        """
+        Body stored apart from its record, by digest.  Bodies spilled to disk are memory mapped.
+
+        :raises LookupError: Expired, deleted or replaced since the record was read.
+        """
+
+        # Guard, spilled to disk.  Files are content addressed, the entry may have been replaced since.
+        if self.cache.bodies is not None:
+            try:
+                return self.cache.bodies.open(digest)
+            except LookupError:
+                pass
+
+        data, stored = self.redis.hmget(key, BODY, DIGEST)
+
+        # Guard, deleted or replaced since the record was read
+        if data is None or stored is None or stored.decode('ascii') != digest:
+            raise LookupError('Body of %r is no longer cached.' % key)
+
+        return load_content(serializers.loads(data)[0])
+
+    def retention(self, results):
+        """Seconds redis keeps results past expiration.  Responses with validators are kept ``revalidate_ex``."""
+        retention = super(MemoizeRequest, self).retention(results)
+
+        # Guard, nothing to revalidate with
+        if not self.cache.revalidate_ex or not self.revalidates or results is None or not conditional_headers(results):
+            return retention
+
+        return max(retention, self.cache.revalidate_ex)
+
+    def conditional(self, func_akw, stale):
+        """Send validators of the stale response, ``If-None-Match`` and ``If-Modified-Since``."""
+        headers = conditional_headers(stale.value) if stale is not None and self.revalidates else None
+
+        # Guard, recompute
+        if not headers:
+            return func_akw
+
+        args, kwargs = func_akw
+        kwargs = dict(kwargs)
+        headers.update(kwargs.get('headers') or {})
+        kwargs['headers'] = headers
+        return args, kwargs
+
+    def revalidated(self, results, stale):
+        """On ``304 Not Modified``, the stale response with updated headers.  The body was not sent again."""
+
+        # Guard, modified or not revalidated
+        if stale is None or getattr(results, 'status_code', None) != 304:
+            return results
+
+        self.statistics.incr('revalidated')
+        return refresh_response(stale.value, results)
 
     @property
-    def redis(self):
-        return self.cache.connection
+    def revalidates(self):
+        """Safe method, revalidated with conditional requests."""
+        return self.func.__name__ in ('get', 'head')
 
-    @redis.setter
-    def redis(self, value):
-        self.cache.connection = value
+    @property
+    def index_ex(self):
+        """Tag index expiration time in seconds.  Outlives responses kept to revalidate."""
+        return super(MemoizeRequest, self).index_ex + (self.cache.revalidate_ex or 0)
 
     @property
-    def ex(self):
-        return self.cache.ex
+    def use_cache(self):
+        all_is_unset = self.cache.all is None
+        return getattr(self.cache, self.func.__name__) if all_is_unset else self.cache.all
 
-    @ex.setter
-    def ex(self, value):
-        self.cache.ex = value
+    redis = cache_option('connection')
+    ex = cache_option('ex')
+    local_cache = cache_option('local_cache')
+    single_flight = cache_option('single_flight')
+    lock = cache_option('lock')
+    stale_ex = cache_option('stale_ex')
+    xfetch_beta = cache_option('xfetch_beta')
+    ex_jitter = cache_option('ex_jitter')
+    serializer = cache_option('serializer')
+    compressor = cache_option('compressor')
+    negative_ex = cache_option('negative_ex')
+    namespace = cache_option('namespace')
+    version = cache_option('version')
+    generation = cache_option('generation')
+    statistics = cache_option('statistics')
+    hooks = cache_option('hooks')
 
 
 class CacheConfig(AttributeDict):
     """A strict dict with attribute access."""
-    __attr__ = 'get', 'options', 'head', 'post', 'put', 'patch', 'delete', 'all', 'connection', 'ex', 'set_cache_cb'
+    __attr__ = ('get', 'options', 'head', 'post', 'put', 'patch', 'delete', 'all', 'connection', 'ex', 'set_cache_cb',
+                'local_cache', 'single_flight', 'lock', 'stale_ex', 'xfetch_beta', 'ex_jitter',
+                'serializer', 'compressor', 'negative_ex', 'namespace', 'version', 'generation',
+                'index_urls', 'statistics', 'hooks', 'http_cache', 'revalidate_ex', 'lazy_body',
+                'spill_body', 'bodies')
+
+    def clear(self):
+        """
+        Invalidate every cached response of the session in constant time.  See :meth:`Memoize.clear`.
+
+        :return: New generation.
+        :rtype: int
+        """
+        return self.generation.bump(self.connection)
+
+    def stats(self):
+        """
+        Statistics of every method, see :meth:`Memoize.stats`.
+
+        :rtype: dict
+        """
+        return self.statistics.snapshot()
+
+    def invalidate(self, host=None, prefix=None, tags=()):
+        """
+        Delete cached responses by host, url prefix or tag.  Only tagged keys are touched.
+
+        Host and prefix need ``index_urls``.
+
+        :param str host: Host, e.g. ``'api.example.com'``.
+        :param str prefix: Absolute url prefix, matched on whole path segments.
+        :param list tags: Tags passed with ``cache_tags``.
+        :return: Number of responses deleted.
+        :rtype: int
+        """
+
+        tags = list(tags)
+        if host:
+            tags.append(host_tag(host))
+        if prefix:
+            tags.append(prefix_tag(prefix))
+
+        start = monotonic()
+        keys = invalidate_tags(self.connection, key_prefix(self.namespace, self.version), tags)
+        io = monotonic() - start
+
+        if self.local_cache is not None:
+            for key in keys:
+                self.local_cache.pop(key)
+
+        if self.hooks.enabled:
+            for key in keys:
+                self.hooks.emit('on_evict', key, None, {'io': io})
+
+        return len(keys)
+
+    def prune(self, age=None):
+        """
+        Delete body files spilled to disk and not written for ``age`` seconds.  See :meth:`DiskBodies.prune`.
+
+        :param float age: Seconds.  Defaults to the longest time a response is kept.
+        :return: Number of files deleted.
+        :rtype: int
+        """
+
+        # Guard, nothing on disk
+        if self.bodies is None:
+            return 0
+
+        if age is None:
+            age = self.ex + max(self.stale_ex or 0, self.revalidate_ex or 0)
+
+        return self.bodies.prune(age)
 
 
 class Session(RequestsSession):
     """:class:`requests.Session` with memoized methods."""
 
-    def __init__(self, ex=None, connection=None):
-        """Set reference to cache configuration on object."""
+    memoize_class = MemoizeRequest
+    """Decorator applied to request methods."""
+
+    def __init__(self, ex=None, connection=None, local_cache=None, single_flight=False, lock=None, stale_ex=None,
+                 xfetch_beta=None, ex_jitter=None, serializer=None, compressor=None, negative_ex=None, namespace=None,
+                 version=None, index_urls=False, hooks=None, http_cache=None, revalidate_ex=None,
+                 lazy_body=64 * 1024, spill_body=None, body_dir=None):
+        """
+        Set reference to cache configuration on object.
+
+        :param int ex: Expiration time in seconds.
+        :param connection: Redis connection handle.
+        :param LRUCache local_cache: In-process cache tier, shared by all methods.
+        :param bool single_flight: Coalesce concurrent identical requests, send once.
+        :param DogpileLock lock: Coordinate misses across processes sharing the db.
+        :param int stale_ex: Serve stale responses this many seconds past ``ex``, refresh in the background.
+        :param float xfetch_beta: Refresh early, with rising probability as expiration nears.  ``1.0`` is typical.
+        :param float ex_jitter: Shorten each entry's ``ex`` by a random fraction, up to ``ex_jitter``.
+        :param str|Serializer serializer: Serializer instance or name.  Defaults to highest protocol ``'pickle'``.
+        :param str|Compressor compressor: Compress large responses.  Compressor instance or name.
+        :param int negative_ex: Expiration time in seconds for falsy responses, i.e. errors kept by ``set_cache_cb``.
+        :param str namespace: Key prefix, shared by all methods.  Defaults to ``'cache_requests.sessions.Session'``.
+        :param version: Part of the key prefix.  Change it to stop reading responses cached by older code.
+        :param bool index_urls: Tag responses by host and path prefix, for :meth:`CacheConfig.invalidate`.
+        :param Hooks hooks: Instrumentation callbacks, shared by all methods.
+        :param bool|HTTPCachePolicy http_cache: Expire responses per their ``Cache-Control`` and ``Expires`` headers,
+            capped by ``ex``.  Skip non-cacheable responses, instead of ``set_cache_cb``.
+        :param int revalidate_ex: Keep ``GET`` and ``HEAD`` responses with an ``ETag`` or ``Last-Modified`` this many
+            seconds past expiration.  Expired responses are revalidated, a ``304`` refreshes them without the body.
+        :param int lazy_body: Store bodies of at least this many bytes apart from headers, read on first access of
+            ``content``.  ``None`` keeps every body with its headers.
+        :param int spill_body: Write bodies of at least this many bytes to files, read through memory maps.  Redis
+            keeps their digest only.  See :meth:`CacheConfig.prune`.
+        :param str body_dir: Directory of spilled bodies.  Defaults to the redislite db file path, plus ``.bodies``.
+        """
 
         super(Session, self).__init__()
 
@@ -110,20 +446,48 @@ class Session(RequestsSession):
             'all': None,
             'connection': connection or default_connection(),
             'ex': ex or default_ex,
-            'set_cache_cb': set_cache_cb
+            'set_cache_cb': set_cache_cb,
+            'local_cache': local_cache,
+            'single_flight': single_flight,
+            'lock': lock,
+            'stale_ex': stale_ex,
+            'xfetch_beta': xfetch_beta,
+            'ex_jitter': ex_jitter,
+            'serializer': serializer,
+            'compressor': compressor,
+            'negative_ex': negative_ex,
+            'namespace': namespace or '%s.Session' % __name__,
+            'version': version,
+            'generation': None,
+            'index_urls': index_urls,
+            'statistics': None,
+            'hooks': hooks or Hooks(),
+            'http_cache': HTTPCachePolicy() if http_cache is True else http_cache or None,
+            'revalidate_ex': revalidate_ex,
+            'lazy_body': lazy_body,
+            'spill_body': spill_body,
+            'bodies': None
         }
 
         # Setup
+        if spill_body is not None:
+            options['bodies'] = DiskBodies(body_dir or default_dir(options['connection']))
+
         self.cache = CacheConfig(**options)
 
         # Decorate methods
-        self.get = MemoizeRequest(self.get, session=self)
-        self.options = MemoizeRequest(self.options, session=self)
-        self.head = MemoizeRequest(self.head, session=self)
-        self.post = MemoizeRequest(self.post, session=self)
-        self.put = MemoizeRequest(self.put, session=self)
-        self.patch = MemoizeRequest(self.patch, session=self)
-        self.delete = MemoizeRequest(self.delete, session=self)
+        self.get = self.memoize_class(self.get, session=self)
+        self.options = self.memoize_class(self.options, session=self)
+        self.head = self.memoize_class(self.head, session=self)
+        self.post = self.memoize_class(self.post, session=self)
+        self.put = self.memoize_class(self.put, session=self)
+        self.patch = self.memoize_class(self.patch, session=self)
+        self.delete = self.memoize_class(self.delete, session=self)
+
+
+def exceeds(response, threshold):
+    """Body of at least ``threshold`` bytes.  ``None`` disables the threshold."""
+    return threshold is not None and response.content is not None and len(response.content) >= threshold
 
 
 def set_cache_cb(response):
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+:mod:`cache_requests.stats`
+~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+.. moduleauthor:: Manu Phatak <bionikspoon@gmail.com>
+
+Cache statistics.  Counters and latency histograms, to tune ``ex`` and capacity.
+
+Private API
+***********
+    * :class:`Stats`
+    * :class:`Histogram`
+
+Source
+******
+"""
+from __future__ import absolute_import, division
+
+from threading import Lock
+
+__all__ = ['Stats', 'Histogram']
+
+
+class Histogram(object):
+    """Latency histogram.  Power of two buckets in microseconds, the last bucket is open ended."""
+
+    buckets = 32
+    """Number of buckets.  The last one starts at about 18 minutes."""
+
+    def __init__(self):
+        self.counts = [0] * self.buckets
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        """Record one sample."""
+        bucket = min(int(seconds * 1e6).bit_length(), self.buckets - 1)
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, percent):
+        """Upper bound of the bucket holding ``percent`` of samples, in seconds.  ``None`` without samples."""
+
+        # Guard, no samples
+        if not self.count:
+            return None
+
+        rank = self.count * percent / 100
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                break
+
+        # Open ended bucket, or a bound past the largest sample
+        return self.max if bucket == self.buckets - 1 else min((1 << bucket) / 1e6, self.max)
+
+    def snapshot(self):
+        """Summary in seconds."""
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+        }
+
+
+class Stats(object):
+    """Per instance cache statistics.  Thread safe."""
+
+    counters = ('hits', 'misses', 'stores', 'skipped_stores', 'busts', 'stored_bytes', 'revalidated')
+    """Counter names."""
+
+    timers = ('lookup', 'compute', 'store')
+    """Latency histogram names."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self):
+        """Zero every counter and histogram."""
+        with self._lock:
+            self.counts = dict.fromkeys(self.counters, 0)
+            self.histograms = dict((name, Histogram()) for name in self.timers)
+
+    def incr(self, name, amount=1):
+        """Increment a counter."""
+        with self._lock:
+            self.counts[name] += amount
+
+    def observe(self, name, seconds):
+        """Record a latency sample."""
+        with self._lock:
+            self.histograms[name].add(seconds)
+
+    def snapshot(self):
+        """
+        Counters, hit ratio and latency summaries.
+
+        :rtype: dict
+        """
+
+        with self._lock:
+            snapshot = dict(self.counts)
+            lookups = snapshot['hits'] + snapshot['misses']
+            snapshot['hit_ratio'] = snapshot['hits'] / lookups if lookups else None
+
+            for name, histogram in self.histograms.items():
+                snapshot[name] = histogram.snapshot()
+
+        return snapshot
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""
+:mod:`cache_requests.tags`
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+.. moduleauthor:: Manu Phatak <bionikspoon@gmail.com>
+
+Tag entries, invalidate by tag.  Each tag has an index set of the keys stored with it, so invalidation only touches
+tagged keys, never the whole keyspace.
+
+Private API
+***********
+    * :func:`url_tags`
+    * :func:`host_tag`
+    * :func:`prefix_tag`
+    * :func:`origin`
+    * :func:`index_key`
+    * :func:`index_tags`
+    * :func:`invalidate_tags`
+
+Source
+******
+"""
+from __future__ import absolute_import
+
+from six.moves.urllib.parse import urlsplit
+
+__all__ = ['url_tags', 'host_tag', 'prefix_tag', 'origin', 'index_key', 'index_tags', 'invalidate_tags']
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+"""Ports left out of prefix tags, so ``http://example.com:80`` and ``http://example.com`` match."""
+
+
+def index_key(prefix, tag):
+    """Index set key of a tag."""
+    return '%s:tag:%s' % (prefix, tag)
+
+
+def host_tag(host):
+    """Tag of every url on a host, any scheme and port.  Ports and credentials are ignored."""
+    return 'host:%s' % (urlsplit('//%s' % host).hostname or '')
+
+
+def prefix_tag(url):
+    """
+    Tag of every url under a path prefix.  Prefixes match whole path segments, queries are ignored.
+
+    :param str url: Absolute url, e.g. ``'https://api.example.com/v1/users'``.
+    """
+    parts = urlsplit(url)
+    return 'prefix:%s%s' % (origin(parts), parts.path.rstrip('/'))
+
+
+def url_tags(url):
+    """Host tag, and a prefix tag per path segment of ``url``."""
+    parts = urlsplit(url)
+    base = origin(parts)
+    tags = ['host:%s' % (parts.hostname or ''), 'prefix:%s' % base]
+
+    path = ''
+    for segment in parts.path.strip('/').split('/'):
+        if segment:
+            path += '/' + segment
+            tags.append('prefix:%s%s' % (base, path))
+
+    return tags
+
+
+def origin(parts):
+    """Scheme, host and port of split url ``parts``.  Default ports and credentials are left out."""
+    scheme = parts.scheme.lower()
+    host = parts.hostname or ''
+
+    # IPv6 literals keep their brackets
+    if ':' in host:
+        host = '[%s]' % host
+
+    port = parts.port
+    if port is None or port == DEFAULT_PORTS.get(scheme):
+        return '%s://%s' % (scheme, host)
+    return '%s://%s:%d' % (scheme, host, port)
+
+
+def index_tags(pipe, prefix, key, tags, ex):
+    """
+    Add key to the index set of each tag.
+
+    :param pipe: Redis pipeline.
+    :param str prefix: Key prefix of the index sets.
+    :param str key: Cache key.
+    :param list tags: Tags.
+    :param float ex: Index expiration time in seconds.  Must outlive the entries.
+    """
+    for tag in tags:
+        name = index_key(prefix, tag)
+        pipe.sadd(name, key)
+        pipe.expire(name, int(ex) + 1)
+
+
+def invalidate_tags(redis, prefix, tags):
+    """
+    Delete every key stored with any of ``tags``.  Keys indexed meanwhile are kept in the index.
+
+    :param redis: Redis connection handle.
+    :param str prefix: Key prefix of the index sets.
+    :param list tags: Tags.
+    :return: Deleted keys.
+    :rtype: list
+    """
+
+    names = [index_key(prefix, tag) for tag in tags]
+
+    # Guard, no tags
+    if not names:
+        return []
+
+    keys = [key.decode('utf-8') if isinstance(key, bytes) else key for key in redis.sunion(names)]
+
+    # Guard, nothing tagged
+    if not keys:
+        return []
+
+    pipe = redis.pipeline(transaction=False)
+    pipe.delete(*keys)
+    for name in names:
+        pipe.srem(name, *keys)
+    pipe.execute()
+
+    return keys
@@ -12,7 +12,9 @@ Private API
 ***********
     * :class:`AttributeDict`
     * :func:`deep_hash`
+    * :func:`flat_digest`
     * :func:`normalize_signature`
+    * :func:`qualified_name`
 
 Source
 ******
@@ -21,17 +23,22 @@ Source
 from __future__ import absolute_import, unicode_literals
 
 import sys
+import types
 from collections import namedtuple
 from functools import partial, wraps
 from hashlib import md5
+from numbers import Number
+from struct import Struct
 from tempfile import gettempdir
 
 from os import path
 from redislite import StrictRedis
 from six import string_types, text_type, integer_types
 
+from ._compat import Mapping, SURROGATES, byte_view
+
 __all__ = ['AttributeDict', 'deep_hash', 'default_connection', 'default_ex', 'normalize_signature', 'make_callback',
-           'temp_file']
+           'qualified_name', 'temp_file']
 
 
 def temp_file(name):
@@ -61,6 +68,14 @@ def make_callback(value):
     return value if callable(value) else lambda *args, **kwargs: value
 
 
+def qualified_name(func):
+    """Module qualified function name.  Falls back to ``__name__`` where there is no ``__qualname__``."""
+    name = getattr(func, '__qualname__', None)
+    if not isinstance(name, string_types):
+        name = func.__name__
+    return '%s.%s' % (func.__module__, name)
+
+
 class AttributeDict(object):
     """Strict dict with attribute access"""
 
@@ -104,7 +119,7 @@ def normalize_signature(func):
         if kwargs:
             args = args, kwargs
 
-        if len(args) is 1:
+        if len(args) == 1:
             args = args[0]
 
         return func(args)
@@ -112,59 +127,409 @@ def normalize_signature(func):
     return wrapper
 
 
-@normalize_signature
-def deep_hash(obj):
-    hasher = DataHasher()
-    hasher.update(obj)
-    return hasher.digest()
+def deep_hash(*args, **kwargs):
+    """
+    Hash arguments into a hex digest.  See :class:`DataHasher`.
+
+    Flat arguments, strings, bytes, numbers, booleans and ``None``, skip the engine, see :func:`flat_digest`.
+    """
+
+    if kwargs or len(args) != 1:
+        digest = flat_digest(args, kwargs)
+        if digest is not None:
+            return digest
+        obj = (args, kwargs) if kwargs else args
+    else:
+        obj = args[0]
+
+    return DataHasher().update(obj).digest()
+
+
+try:
+    from hashlib import blake2b
+
+    new_digest = partial(blake2b, digest_size=16)
+except ImportError:  # pragma: no cover
+    new_digest = md5
+
+LENGTH = Struct('>Q').pack
+CHUNK_SIZE = 1 << 20
+"""Buffers this large are hashed in place, chunk by chunk, instead of joined."""
+INLINE_SIZE = 1 << 10
+"""Lists, dicts, sets and objects whose contents feed this many bytes are fed as their digest instead."""
+FUNCTION_TYPES = (type, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+BUILTIN_BASES = ((text_type, text_type), (bytes, bytes), (tuple, tuple), (list, list), (Mapping, dict),
+                 (frozenset, frozenset), (set, set))
+"""Subclass and builtin it is hashed as, e.g. ``OrderedDict`` as ``dict``."""
+EXIT = object()
+"""Stack marker of :class:`DataHasher`.  The innermost open value is done."""
+
+
+def encode_text(obj):
+    data = obj.encode('utf-8', SURROGATES)
+    return b's' + LENGTH(len(data)) + data
+
+
+def encode_bytes(obj):
+    # Guard, large buffers are hashed in place by the engine
+    if len(obj) >= CHUNK_SIZE:
+        raise KeyError(bytes)
+    return b'b' + LENGTH(len(obj)) + obj
+
+
+def encode_number(obj):
+    return b'i' + str(obj).encode('ascii') + b';'
+
+
+flat_encoders = {
+    text_type: encode_text,
+    bytes: encode_bytes,
+    bool: lambda obj: b'T' if obj else b'F',
+    float: lambda obj: b'f' + repr(obj).encode('ascii') + b';',
+    type(None): lambda obj: b'N',
+}
+flat_encoders.update((cls, encode_number) for cls in integer_types)
+"""Encoder per flat type.  Same bytes as :class:`DataHasher`."""
+
+
+def flat_digest(args, kwargs):
+    """
+    Digest of flat arguments, without the engine.  Equal to the :class:`DataHasher` digest of ``args`` or
+    ``(args, kwargs)``.
+
+    :param tuple args: Arguments.
+    :param dict kwargs: Keyword arguments.
+    :return: Hex digest.  ``None`` if any argument is not flat.
+    """
+
+    encoders = flat_encoders
+    parts = [b't', LENGTH(len(args))]
+    try:
+        for arg in args:
+            parts.append(encoders[type(arg)](arg))
+
+        # Large dicts are fed as their digest
+        if kwargs:
+            items = [b'd', LENGTH(len(kwargs))]
+            for name, value in sorted(kwargs.items()):
+                items.append(encoders[type(name)](name))
+                items.append(encoders[type(value)](value))
+            data = b''.join(items)
+            parts[:0] = [b't', LENGTH(2)]
+            parts.append(data if len(data) < INLINE_SIZE else b'h' + new_digest(data).digest())
+    except KeyError:
+        return None
+
+    digest = new_digest(b''.join(parts))
+    return digest.hexdigest()
 
 
 class DataHasher(object):
+    """
+    Iterative hashing engine.  Every value is framed by a one byte type tag, containers by their length, so distinct
+    structures never feed the same bytes.
+
+    Objects are hashed by type and instance state, functions and classes by qualified name, other numbers, e.g.
+    ``Decimal``, ``Fraction`` and ``complex``, by type and ``str``.  Subclasses of builtins, e.g. ``OrderedDict``, by
+    type, contents and instance state.
+
+    Lists, dicts, sets and objects are hashed once per call, inline, or as their digest past :data:`INLINE_SIZE`
+    bytes.  Repeats feed the same bytes, so shared and equal values get equal keys.  Cycles end in a back-reference to
+    the enclosing value.
+    """
+
+    type_tags = {}
+    """Tag per user type, built on first use."""
+
+    unbuffered_types = set()
+    """Types without the buffer protocol, found on first use."""
+
+    builtin_bases = {}
+    """Builtin per subclass, ``None`` for other types, found on first use."""
+
     def __init__(self):
-        self.md5 = md5()
+        self.hash = new_digest()
+        self.parts = []
+        self.memo = {}
+        self.frames = []
 
     def update(self, obj):
+        parts = self.parts = []
+        feed = parts.append
+        stack = [obj]
+        pop, push, extend = stack.pop, stack.append, stack.extend
+        memo, frames = self.memo, self.frames
+
+        while stack:
+            obj = pop()
+            cls = type(obj)
+
+            if cls is text_type:
+                data = obj.encode('utf-8', SURROGATES)
+                feed(b's')
+                feed(LENGTH(len(data)))
+                feed(data)
+
+            elif cls is bool:
+                feed(b'T' if obj else b'F')
+
+            elif cls in integer_types:
+                feed(b'i')
+                feed(str(obj).encode('ascii'))
+                feed(b';')
+
+            elif cls is tuple:
+                feed(b't')
+                feed(LENGTH(len(obj)))
+                extend(obj[::-1])
+
+            elif cls is dict or cls is list or cls is set:
+                # Seen and open, inlined, see :meth:`seen`
+                ref = memo.get(id(obj))
+                if ref is not None:
+                    feed(ref[0] if ref[0] is not None else b'r' + LENGTH(len(frames) - ref[1]))
+                    continue
+                frames.append([len(parts), None, obj])
+                memo[id(obj)] = None, len(frames)
+                push(EXIT)
+
+                if cls is dict:
+                    feed(b'd')
+                    feed(LENGTH(len(obj)))
+                    for key, value in reversed(self.sorted_items(obj)):
+                        push(value)
+                        push(key)
+                elif cls is list:
+                    feed(b'l')
+                    feed(LENGTH(len(obj)))
+                    extend(obj[::-1])
+                else:
+                    feed(b'e')
+                    feed(LENGTH(len(obj)))
+                    extend(reversed(self.sorted_keys(obj)))
+
+            elif obj is EXIT:
+                self.close()
+
+            elif cls is float:
+                feed(b'f')
+                feed(repr(obj).encode('ascii'))
+                feed(b';')
+
+            elif obj is None:
+                feed(b'N')
+
+            elif cls is bytes:
+                feed(b'b')
+                feed(LENGTH(len(obj)))
+                if len(obj) < CHUNK_SIZE:
+                    feed(obj)
+                else:
+                    self.update_buffer(parts, memoryview(obj))
+
+            elif cls is frozenset:
+                feed(b'e')
+                feed(LENGTH(len(obj)))
+                extend(reversed(self.sorted_keys(obj)))
+
+            elif isinstance(obj, FUNCTION_TYPES):
+                feed(b'c')
+                feed(self.type_tag(obj))
+
+            elif self.builtin_base(cls) is not None:
+                # Subclasses, e.g. OrderedDict and namedtuple: type, contents as the builtin, then attributes
+                if self.seen(obj, feed):
+                    continue
+                push(EXIT)
+                feed(b'u')
+                feed(self.type_tag(cls))
+                push(self.state(obj) if hasattr(obj, '__dict__') else {})
+                push(self.builtin_base(cls)(obj))
+
+            else:
+                view = self.buffer(obj)
+
+                if view is None and isinstance(obj, Number):
+                    feed(b'n')
+                    feed(self.type_tag(cls))
+                    data = str(obj).encode('ascii')
+                    feed(LENGTH(len(data)))
+                    feed(data)
+                    continue
+
+                if view is None:
+                    if self.seen(obj, feed):
+                        continue
+                    push(EXIT)
+                    feed(b'o')
+                    feed(self.type_tag(cls))
+
+                    # State is a temporary dict, never shared: fed inline, without a frame
+                    state = self.state(obj)
+                    feed(b'd')
+                    feed(LENGTH(len(state)))
+                    for key, value in reversed(self.sorted_items(state)):
+                        push(value)
+                        push(key)
+                    continue
+
+                feed(b'B')
+                feed(self.type_tag(cls))
+                feed(LENGTH(len(view.format)))
+                feed(view.format.encode('ascii'))
+                feed(LENGTH(view.ndim))
+                for size in view.shape or ():
+                    feed(LENGTH(size))
+                data = byte_view(view)
+                feed(LENGTH(len(data)))
+                self.update_buffer(parts, data)
+
+        self.hash.update(b''.join(parts))
+        del parts[:]
+        return self
+
+    def seen(self, obj, feed):
+        """
+        Feed objects hashed before, by identity, or open ``obj`` until the next :data:`EXIT`.  Shared objects feed
+        their bytes again, cycles a back-reference.
+
+        :param obj: List, dict, set or object.
+        :param function feed: Appends bytes to hash.
+        :return: ``True`` if ``obj`` was seen, its bytes or a back-reference are fed instead.
+        """
+
+        # Done: bytes, open: depth of the enclosing value, cycles end there
+        ref = self.memo.get(id(obj))
+        if ref is not None:
+            feed(ref[0] if ref[0] is not None else b'r' + LENGTH(len(self.frames) - ref[1]))
+            return True
+
+        self.frames.append([len(self.parts), None, obj])
+        self.memo[id(obj)] = None, len(self.frames)
+        return False
+
+    def close(self):
+        """
+        End the innermost open value.  Its bytes are joined in place, or replaced by their digest from
+        :data:`INLINE_SIZE` bytes, and remembered for repeats.
+        """
+        start, hash, obj = self.frames.pop()
+
+        data = b''.join(self.parts[start:])
+        if hash is not None:
+            hash.update(data)
+            data = b'h' + hash.digest()
+        elif len(data) >= INLINE_SIZE:
+            data = b'h' + new_digest(data).digest()
+        self.parts[start:] = [data]
+
+        # Keep obj alive, its id must not be reused by a temporary while hashing
+        self.memo[id(obj)] = data, obj
+
+    def update_buffer(self, parts, data):
+        """
+        Hash buffer contents, in place.  Large buffers flush ``parts`` and are hashed in chunks, without copies.
+
+        :param list parts: Pending bytes, hashed at the end of :meth:`update`.
+        :param memoryview data: Flat bytes view, see :func:`byte_view`.
+        """
+
+        # Guard, small enough to join
+        if len(data) < CHUNK_SIZE:
+            parts.append(data.tobytes())
+            return
+
+        # Contents of the innermost open value are digested, see :meth:`close`
+        if self.frames:
+            frame = self.frames[-1]
+            start = frame[0]
+            if frame[1] is None:
+                frame[1] = new_digest()
+            hash = frame[1]
+        else:
+            start, hash = 0, self.hash
+
+        hash.update(b''.join(parts[start:]))
+        del parts[start:]
+
+        for start in range(0, len(data), CHUNK_SIZE):
+            hash.update(data[start:start + CHUNK_SIZE])
+
+    def digest(self):
+        return self.hash.hexdigest()
+
+    @classmethod
+    def type_tag(cls, obj):
+        """Length prefixed qualified name of a type or function."""
+
+        try:
+            return cls.type_tags[obj]
+        except (KeyError, TypeError):
+            pass
+
+        name = getattr(obj, '__qualname__', None)
+        if not isinstance(name, string_types):
+            name = getattr(obj, '__name__', type(obj).__name__)
+        data = ('%s.%s' % (getattr(obj, '__module__', None), name)).encode('utf-8')
+        tag = LENGTH(len(data)) + data
 
-        self.md5.update(text_type(type(obj)).encode())
+        if isinstance(obj, type):
+            cls.type_tags[obj] = tag
+        return tag
 
-        if isinstance(obj, string_types):
-            self.md5.update(obj.encode())
-            return self
+    @classmethod
+    def builtin_base(cls, obj_type):
+        """Builtin ``obj_type`` subclasses, see :data:`BUILTIN_BASES`.  ``None`` for other types."""
 
-        if isinstance(obj, (integer_types, float)):
-            self.update(text_type(obj))
-            return self
+        try:
+            return cls.builtin_bases[obj_type]
+        except KeyError:
+            pass
 
-        if isinstance(obj, (tuple, list, set)):
-            for item in obj:
-                self.update(item)
-            return self
+        base = next((base for parent, base in BUILTIN_BASES if issubclass(obj_type, parent)), None)
+        cls.builtin_bases[obj_type] = base
+        return base
 
-        if isinstance(obj, dict):
-            for key, value in sorted(obj.items()):
-                self.update(key)
-                self.update(value)
-            return self
+    @classmethod
+    def buffer(cls, obj):
+        """Buffer protocol view of ``obj``: bytearray, memoryview, array, numpy arrays.  ``None`` for other objects."""
 
-        for attr in dir(obj):
+        # Guard, known not to expose a buffer
+        if type(obj) in cls.unbuffered_types:
+            return None
 
-            # Guard, un serializable attributes
-            if attr.startswith('__'):
-                continue
+        try:
+            return memoryview(obj)
+        except TypeError:
+            cls.unbuffered_types.add(type(obj))
+        except ValueError:  # e.g. numpy object arrays
+            pass
+        return None
 
-            # Guard, mock objects / added by inspection tools
-            if attr.startswith('func_'):
-                continue
+    @staticmethod
+    def state(obj):
+        """Instance attributes, without private and callable values.  Falls back to a ``dir`` walk."""
 
-            attr_value = getattr(obj, attr)
+        attrs = getattr(obj, '__dict__', None)
+        if attrs is None:
+            names = dir(obj)
+            attrs = dict((name, getattr(obj, name)) for name in names if not name.startswith('__'))
 
-            # Guard, functions
-            if callable(attr_value):
-                continue
+        return dict((name, value) for name, value in attrs.items()
+                    if not name.startswith('__') and not name.startswith('func_') and not callable(value))
 
-            self.update(attr)
-            self.update(attr_value)
-        return self
+    @classmethod
+    def sorted_keys(cls, keys):
+        """Sort keys.  Keys of mixed, unorderable types are sorted by their own digest."""
+        try:
+            return sorted(keys)
+        except TypeError:
+            return sorted(keys, key=lambda key: cls().update(key).digest())
 
-    def digest(self):
-        return self.md5.hexdigest()
+    @classmethod
+    def sorted_items(cls, obj):
+        """Dict items, in key order."""
+        try:
+            return sorted(obj.items())
+        except TypeError:
+            return sorted(obj.items(), key=lambda item: cls().update(item[0]).digest())
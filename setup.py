@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 # coding=utf-8
 """The full documentation is at https://cache_requests.readthedocs.org."""
+import sys
 
 try:
     from setuptools import setup
@@ -38,7 +39,14 @@ with open('HISTORY.rst') as history_file:
     history = history_file.read()
 
 requirements = ['redislite', 'requests', 'six']
+if sys.version_info[0] == 2:
+    requirements.append('futures')
 test_requirements = ['pytest', 'mock']
+extras_requirements = {
+    'msgpack': ['msgpack'],
+    'lz4': ['lz4'],
+    'zstd': ['zstandard'],
+}
 
 setup(  # :off
     name='cache_requests',
@@ -52,6 +60,7 @@ setup(  # :off
     package_dir={'cache_requests':'cache_requests'},
     include_package_data=True,
     install_requires=requirements,
+    extras_require=extras_requirements,
     license='MIT',
     zip_safe=False,
     cmdclass={'test': PyTest},
@@ -1,10 +1,15 @@
 #!/usr/bin/env python
 # coding=utf-8
+from datetime import timedelta
 from functools import partial
 
-from mock import Mock
+from mock import MagicMock, Mock
 from pytest import fixture
 
+from cache_requests._compat import PY35
+
+collect_ignore = [] if PY35 else ['test_aio.py']
+
 
 @fixture(autouse=True)
 def a_function_setup(tmpdir, monkeypatch):
@@ -47,11 +52,86 @@ def redis_mock():
     def delete(key):
         cache.pop(key)
 
+    def hget(name, field):
+        return cache.get(name, {}).get(field)
+
+    def eval_(script, numkeys, name, px, *fields):
+        cache[name] = dict(zip(fields[::2], fields[1::2]))
+
+    def pipeline(**_):
+        queued = []
+        pipe = Mock()
+        pipe.get = lambda name: queued.append(partial(_MockRedis.get, name))
+        pipe.hget = lambda name, field: queued.append(partial(_MockRedis.hget, name, field))
+        pipe.pttl = lambda name: queued.append(partial(_MockRedis.pttl, name))
+        pipe.execute = lambda **_: [command() for command in queued]
+        return pipe
+
     _MockRedis = Mock(spec='redislite.StrictRedis')
     _MockRedis.cache = cache
     _MockRedis.get = Mock(side_effect=get)
     _MockRedis.set = Mock(side_effect=set)
+    _MockRedis.hget = Mock(side_effect=hget)
+    _MockRedis.eval = Mock(side_effect=eval_)
     _MockRedis.delete = Mock(side_effect=delete)
+    _MockRedis.pttl = Mock(return_value=-1)
+    _MockRedis.pipeline = Mock(side_effect=pipeline)
     _MockRedis.flushall = Mock()
 
     return _MockRedis
+
+
+@fixture
+def mock_session_request():
+    from requests import Response, Request, HTTPError
+
+    def raise_for_status():
+        if response.status_code >= 400:
+            raise HTTPError
+
+    response = MagicMock(spec=Response)
+    response.status_code = 200
+    response.url = 'http://google.com'
+    response.reason = 'OK'
+    response.headers = {}
+    response.encoding = None
+    response.elapsed = timedelta(0)
+    response.history = []
+    response.request = None
+    response.raise_for_status = Mock(spec=raise_for_status, side_effect=raise_for_status)
+
+    session_request = MagicMock(spec=Request)
+    session_request.response = response
+    session_request.return_value = response
+
+    return session_request
+
+
+@fixture
+def patch_requests(monkeypatch, mock_session_request):
+    """
+    :type monkeypatch: _pytest.monkeypatch.monkeypatch
+    :type mock_session_request: mock.MagicMock
+    """
+    import json
+    from cache_requests.responses import is_record
+
+    def pickle_dumps(_, value):
+        obj = {
+            'status_code': value[1] if is_record(value) else value.status_code
+        }
+        return json.dumps(obj).encode('utf-8')
+
+    def pickle_loads(_, value):
+        try:
+            value_string = value.decode("utf-8")
+        except AttributeError:
+            value_string = str(value)
+
+        obj = json.loads(value_string)
+        mock_session_request.response.status_code = obj.get('status_code')
+        return mock_session_request
+
+    monkeypatch.setattr('cache_requests.serializers.PickleSerializer.dumps', pickle_dumps)
+    monkeypatch.setattr('cache_requests.serializers.PickleSerializer.loads', pickle_loads)
+    monkeypatch.setattr('requests.sessions.Session.request', mock_session_request)
@@ -0,0 +1,252 @@
+#!/usr/bin/env python
+# coding=utf-8
+import asyncio
+
+from pytest import fixture, mark
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+@fixture
+def amazing_coroutine():
+    from cache_requests import AsyncMemoize
+
+    calls = []
+
+    async def amazing_coroutine(*args, **kwargs):
+        calls.append((args, kwargs))
+        await asyncio.sleep(0.01)
+        return len(args), len(kwargs)
+
+    memoized = AsyncMemoize(amazing_coroutine, ex=1)
+    memoized.calls = calls
+    return memoized
+
+
+def test_memoized_coroutine_called_only_once_per_arguments(amazing_coroutine):
+    """:type amazing_coroutine: cache_requests.AsyncMemoize"""
+
+    async def scenario():
+        assert await amazing_coroutine(1, 2, 'three') == (3, 0)
+        assert await amazing_coroutine(1, 2, 'three') == (3, 0)
+        assert len(amazing_coroutine.calls) == 1
+
+        assert await amazing_coroutine(1, 2, 'three', this='test') == (3, 1)
+        assert len(amazing_coroutine.calls) == 2
+
+        assert await amazing_coroutine(1, 2, 'three', bust_cache=True) == (3, 0)
+        assert len(amazing_coroutine.calls) == 3
+
+    run(scenario())
+    assert amazing_coroutine.redis.dbsize() == 2
+
+
+def test_concurrent_awaits_are_coalesced(amazing_coroutine):
+    """:type amazing_coroutine: cache_requests.AsyncMemoize"""
+
+    async def scenario():
+        return await asyncio.gather(*[amazing_coroutine('hello', 'world') for _ in range(8)])
+
+    assert run(scenario()) == [(2, 0)] * 8
+    assert len(amazing_coroutine.calls) == 1
+    assert amazing_coroutine.inflight == {}
+
+
+def test_shares_keys_with_memoize(amazing_coroutine):
+    """:type amazing_coroutine: cache_requests.AsyncMemoize"""
+
+    from cache_requests import Memoize
+
+    @Memoize(namespace=amazing_coroutine.namespace)
+    def amazing_coroutine_(*args, **kwargs):
+        raise AssertionError('Should be served from cache.')
+
+    amazing_coroutine_.func.__name__ = 'amazing_coroutine'
+
+    run(amazing_coroutine('hello', 'world'))
+    assert amazing_coroutine_('hello', 'world') == (2, 0)
+
+
+def test_dogpile_lock_waits_for_holder():
+    from cache_requests import AsyncMemoize, DogpileLock
+
+    calls = []
+
+    async def hello(*args):
+        calls.append(args)
+        return len(args)
+
+    memoized = AsyncMemoize(hello, lock=DogpileLock(interval=0.01))
+    key = memoized.make_key('hello', 'world')
+
+    async def scenario():
+        # another process holds the lock, stores results shortly
+        token = memoized.lock.acquire(memoized.redis, key)
+
+        async def holder():
+            await asyncio.sleep(0.05)
+            memoized[key] = 'holder results'
+            memoized.lock.release(memoized.redis, key, token)
+
+        results, _ = await asyncio.gather(memoized('hello', 'world'), holder())
+        return results
+
+    assert run(scenario()) == 'holder results'
+    assert calls == []
+
+
+@mark.usefixtures('patch_requests')
+def test_async_session_get(mock_session_request):
+    """:type mock_session_request: mock.MagicMock"""
+
+    from cache_requests import AsyncSession, Session
+
+    requests = AsyncSession()
+
+    async def scenario():
+        await asyncio.gather(*[requests.get('http://google.com') for _ in range(4)])
+        await requests.get('http://google.com')
+
+    run(scenario())
+    assert mock_session_request.call_count == 1
+
+    # TEST SHARED STORAGE WITH BLOCKING SESSION
+    # ------------------------------------------------------------------------
+    Session().get('http://google.com')
+    assert mock_session_request.call_count == 1
+
+    # TEST TOGGLED OFF
+    # ------------------------------------------------------------------------
+    requests.cache.get = False
+    run(requests.get('http://google.com'))
+    assert mock_session_request.call_count == 2
+
+
+def test_many(amazing_coroutine):
+    """:type amazing_coroutine: cache_requests.AsyncMemoize"""
+
+    async def scenario():
+        assert await amazing_coroutine(1) == (1, 0)
+        assert await amazing_coroutine.many([1, (1, 2), 'three', (1, 2)]) == [(1, 0), (2, 0), (1, 0), (2, 0)]
+        assert len(amazing_coroutine.calls) == 3
+
+        assert await amazing_coroutine.many([(1, 2), 'three']) == [(2, 0), (1, 0)]
+        assert len(amazing_coroutine.calls) == 3
+
+    run(scenario())
+
+
+def test_hooks_and_stats(amazing_coroutine):
+    """:type amazing_coroutine: cache_requests.AsyncMemoize"""
+
+    events = []
+    for name in ('on_hit', 'on_miss', 'on_store'):
+        amazing_coroutine.hooks.register(name, events.append)
+
+    async def scenario():
+        await amazing_coroutine('hello')
+        await amazing_coroutine('hello')
+        await amazing_coroutine.many(['hello', 'world'])
+
+    run(scenario())
+    assert [event.hook for event in events] == ['on_miss', 'on_store', 'on_hit', 'on_hit', 'on_miss', 'on_store']
+    assert set(events[2].timings) == {'hash', 'io', 'deserialize'}
+
+    stats = amazing_coroutine.stats()
+    assert (stats['hits'], stats['misses'], stats['stores']) == (2, 2, 2)
+
+
+def test_failed_background_refresh_is_logged(monkeypatch, caplog):
+    from cache_requests import AsyncMemoize
+
+    # LOCAL SETUP
+    # ------------------------------------------------------------------------
+    now = [1000.0]
+    monkeypatch.setattr('cache_requests.memoize.time', lambda: now[0])
+    calls = []
+
+    async def flaky(*args):
+        calls.append(args)
+        if len(calls) > 1:
+            raise ValueError('upstream down')
+        return 'sample text'
+
+    memoized = AsyncMemoize(flaky, ex=10, stale_ex=60)
+
+    async def scenario():
+        assert await memoized('hello') == 'sample text'
+        now[0] += 10
+        assert await memoized('hello') == 'sample text'
+        await asyncio.sleep(0.01)
+
+    # TEST STALE RESULTS STAY, THE FAILURE IS LOGGED
+    # ------------------------------------------------------------------------
+    run(scenario())
+    assert len(calls) == 2
+    assert memoized.inflight == {}
+    assert 'Refreshing results failed' in caplog.text
+    assert 'upstream down' in caplog.text
+
+
+def test_async_session_reads_bodies_off_the_loop(monkeypatch):
+    import threading
+
+    from requests import Response
+    from cache_requests import AsyncSession
+
+    # LOCAL SETUP
+    # ------------------------------------------------------------------------
+    threads = {'redis': [], 'request': []}
+
+    def request(self, method, url, *args, **kwargs):
+        threads['request'].append(threading.get_ident())
+        response = Response()
+        response.status_code = 200
+        response.url = url
+        response._content = b'large body' * 100
+        return response
+
+    monkeypatch.setattr('requests.sessions.Session.request', request)
+    requests = AsyncSession(lazy_body=1000)
+    pool = requests.cache.connection.connection_pool
+    get_connection = pool.get_connection
+
+    def checkout(*args, **kwargs):
+        threads['redis'].append(threading.get_ident())
+        return get_connection(*args, **kwargs)
+
+    monkeypatch.setattr(pool, 'get_connection', checkout)
+    key = requests.get.make_key('http://example.com/large')
+
+    async def scenario():
+        loop_thread = threading.get_ident()
+        await requests.get('http://example.com/large')
+
+        # TEST HITS READ THE BODY FROM THE EXECUTOR
+        # ------------------------------------------------------------------------
+        del threads['redis'][:]
+        response = await requests.get('http://example.com/large')
+        assert response.content == b'large body' * 100
+        responses = await requests.get.many(['http://example.com/large'])
+        assert responses[0].content == b'large body' * 100
+
+        # TEST BODIES NO LONGER CACHED ARE SENT AGAIN FROM THE EXECUTOR
+        # ------------------------------------------------------------------------
+        del threads['request'][:]
+        await requests.get.run_in_executor(requests.cache.connection.hdel, key, 'body')
+        response = await requests.get('http://example.com/large')
+        assert response.content == b'large body' * 100
+        assert len(threads['request']) == 1
+
+        return loop_thread
+
+    loop_thread = run(scenario())
+    assert threads['redis']
+    assert loop_thread not in threads['redis']
+    assert loop_thread not in threads['request']
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# coding=utf-8
+import mmap
+import os
+from hashlib import sha256
+
+from pytest import raises
+
+from cache_requests.bodies import DiskBodies, default_dir
+
+
+def test_put_and_open(tmpdir):
+    bodies = DiskBodies(str(tmpdir.join('bodies')))
+    digest = bodies.put(b'large body' * 100)
+
+    assert digest == sha256(b'large body' * 100).hexdigest()
+    assert os.path.exists(bodies.path(digest))
+
+    body = bodies.open(digest)
+    assert isinstance(body, mmap.mmap)
+    assert body[:] == b'large body' * 100
+    assert bytes(memoryview(body)[:10]) == b'large body'
+
+
+def test_content_addressed(tmpdir):
+    bodies = DiskBodies(str(tmpdir))
+
+    assert bodies.put(b'same') == bodies.put(b'same')
+    assert bodies.put(b'same') != bodies.put(b'other')
+    assert sum(len(files) for _, _, files in os.walk(str(tmpdir))) == 2
+
+
+def test_empty_body(tmpdir):
+    bodies = DiskBodies(str(tmpdir))
+    assert bodies.open(bodies.put(b'')) == b''
+
+
+def test_prune(tmpdir):
+    bodies = DiskBodies(str(tmpdir))
+    old, new = bodies.put(b'old'), bodies.put(b'new')
+    os.utime(bodies.path(old), (0, 0))
+
+    assert bodies.prune(60) == 1
+    assert bodies.open(new)[:] == b'new'
+    with raises(LookupError):
+        bodies.open(old)
+
+    # Writes touch existing files
+    os.utime(bodies.path(new), (0, 0))
+    bodies.put(b'new')
+    assert bodies.prune(60) == 0
+
+
+def test_default_dir(tmpdir):
+    from redislite import StrictRedis
+
+    db = str(tmpdir.join('test.db'))
+    assert default_dir(StrictRedis(db)) == db + '.bodies'
+
+    with raises(ValueError):
+        default_dir(object())
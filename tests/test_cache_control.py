@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# coding=utf-8
+from email.utils import formatdate
+
+from pytest import fixture
+from requests import Response
+
+from cache_requests.cache_control import (HTTPCachePolicy, conditional_headers, parse_cache_control, parse_date,
+                                          refresh_response)
+
+
+def make_response(status_code=200, **headers):
+    response = Response()
+    response.status_code = status_code
+    response.headers.update((name.replace('_', '-'), value) for name, value in headers.items())
+    return response
+
+
+@fixture
+def policy():
+    return HTTPCachePolicy()
+
+
+def test_parse_cache_control():
+    assert parse_cache_control('') == {}
+    assert parse_cache_control('Public, max-age=60, s-maxage="120", no-transform') == {
+        'public': True,
+        'max-age': '60',
+        's-maxage': '120',
+        'no-transform': True,
+    }
+
+
+def test_parse_date():
+    assert parse_date('Thu, 01 Jan 1970 00:01:00 GMT') == 60
+    assert parse_date('0') is None
+    assert parse_date(None) is None
+
+
+def test_max_age(policy):
+    assert policy.ttl(make_response(Cache_Control='max-age=60'), ex=3600) == 60
+    assert policy.ttl(make_response(Cache_Control='max-age=60'), ex=10) == 10
+    assert policy.ttl(make_response(Cache_Control='max-age=60', Age='50'), ex=3600) == 10
+    assert policy.ttl(make_response(Cache_Control='max-age=60', Age='60'), ex=3600) is None
+    assert policy.ttl(make_response(Cache_Control='max-age=0'), ex=3600) is None
+    assert policy.ttl(make_response(Cache_Control='max-age=bogus'), ex=3600) is None
+
+
+def test_expires(policy):
+    date = 'Thu, 01 Jan 1970 00:00:00 GMT'
+
+    assert policy.ttl(make_response(Expires='Thu, 01 Jan 1970 00:01:00 GMT', Date=date), ex=3600) == 60
+    assert policy.ttl(make_response(Expires='0', Date=date), ex=3600) is None
+    assert 0 < policy.ttl(make_response(Expires=formatdate(usegmt=True, timeval=2e9)), ex=3600) <= 3600
+    assert policy.ttl(make_response(Expires=date, Cache_Control='max-age=60'), ex=3600) == 60
+
+
+def test_not_cacheable(policy):
+    assert policy.ttl(make_response(Cache_Control='no-store, max-age=60'), ex=3600) is None
+    assert policy.ttl(make_response(Cache_Control='no-cache'), ex=3600) is None
+    assert policy.ttl(make_response(Vary='*'), ex=3600) is None
+    assert policy.ttl(make_response(201), ex=3600) is None
+    assert policy.ttl(make_response(500, Cache_Control='max-age=60'), ex=3600) is None
+
+
+def test_heuristic(policy):
+    assert policy.ttl(make_response(), ex=3600) == 3600
+    assert policy.ttl(make_response(404), ex=3600) is None
+    assert policy.ttl(make_response(404, Cache_Control='max-age=60'), ex=3600) == 60
+    assert HTTPCachePolicy(heuristic=False).ttl(make_response(), ex=3600) is None
+
+
+def test_shared():
+    private = make_response(Cache_Control='private, max-age=60, s-maxage=120')
+
+    assert HTTPCachePolicy().ttl(private, ex=3600) == 60
+    assert HTTPCachePolicy(shared=True).ttl(private, ex=3600) is None
+    assert HTTPCachePolicy(shared=True).ttl(make_response(Cache_Control='max-age=60, s-maxage=120'), ex=3600) == 120
+
+
+def test_conditional_headers():
+    assert conditional_headers(make_response()) == {}
+    assert conditional_headers(make_response(ETag='"v1"', Last_Modified='Thu, 01 Jan 1970 00:00:00 GMT')) == {
+        'If-None-Match': '"v1"',
+        'If-Modified-Since': 'Thu, 01 Jan 1970 00:00:00 GMT',
+    }
+
+
+def test_refresh_response():
+    stored = make_response(ETag='"v1"', Content_Length='5', Cache_Control='max-age=60')
+    stored._content = b'hello'
+    not_modified = make_response(304, Content_Length='0', Cache_Control='max-age=120', Date='now')
+
+    assert refresh_response(stored, not_modified) is stored
+    assert stored.status_code == 200
+    assert stored.content == b'hello'
+    assert stored.headers['Content-Length'] == '5'
+    assert stored.headers['Cache-Control'] == 'max-age=120'
+    assert stored.headers['Date'] == 'now'
+    assert stored.headers['ETag'] == '"v1"'
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# coding=utf-8
+from pytest import importorskip, mark, raises
+
+from cache_requests import serializers
+from cache_requests.compression import ZlibCompressor, get_compressor
+
+large_text = 'hash a dictionary python ' * 200
+serializer = serializers.get_serializer('pickle')
+
+
+def test_compresses_above_threshold():
+    compressor = ZlibCompressor(threshold=1024)
+    plain = serializers.dumps(large_text, serializer)
+    data = serializers.dumps(large_text, serializer, compressor=compressor)
+
+    assert len(data) < len(plain) / 10
+    assert serializers.loads(data) == (large_text, 0)
+
+
+def test_skips_below_threshold():
+    compressor = ZlibCompressor(threshold=1024)
+
+    assert serializers.dumps('small', serializer, compressor=compressor) == serializers.dumps('small', serializer)
+
+
+def test_skips_incompressible():
+    import os
+
+    compressor = ZlibCompressor(threshold=0)
+    noise = os.urandom(2048)
+
+    assert serializers.dumps(noise, serializer, compressor=compressor) == serializers.dumps(noise, serializer)
+
+
+def test_keeps_flags():
+    compressor = ZlibCompressor(threshold=0)
+    data = serializers.dumps([large_text, None, 0], serializer, serializers.FLAG_ENTRY, compressor)
+
+    assert serializers.loads(data) == ([large_text, None, 0], serializers.FLAG_ENTRY)
+
+
+@mark.parametrize('name, module', [('lz4', 'lz4.frame'), ('zstd', 'zstandard')])
+def test_optional_compressors(name, module):
+    importorskip(module)
+
+    compressor = get_compressor(name)
+    data = serializers.dumps(large_text, serializer, compressor=compressor)
+
+    assert len(data) < len(large_text)
+    assert serializers.loads(data) == (large_text, 0)
+
+
+def test_get_compressor():
+    assert get_compressor() is None
+    assert isinstance(get_compressor('zlib'), ZlibCompressor)
+
+    with raises(ValueError):
+        get_compressor('rar')
+
+
+def test_memoize_compresses_large_values():
+    from cache_requests import Memoize
+
+    @Memoize(compressor=ZlibCompressor(threshold=1024))
+    def hello(*args):
+        return large_text
+
+    assert hello('hello') == large_text
+    key = hello.redis.keys()[0]
+    assert hello.redis.strlen(key) < len(large_text) / 10
+
+    # read back by an instance without compression
+    assert Memoize(hello.func)('hello') == large_text
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+# coding=utf-8
+from pytest import raises
+
+
+def test_register_and_unregister():
+    from cache_requests import Hooks
+
+    events = []
+    hooks = Hooks()
+    assert not hooks.enabled
+
+    callback = hooks.register('on_hit', events.append)
+    assert hooks.enabled
+
+    hooks.emit('on_hit', 'key', 'hello', {'io': 0.1})
+    hooks.emit('on_miss', 'key', 'hello')
+    assert [(event.hook, event.key, event.name, event.timings) for event in events] == [
+        ('on_hit', 'key', 'hello', {'io': 0.1})]
+
+    hooks.unregister('on_hit', callback)
+    assert not hooks.enabled
+
+    with raises(ValueError):
+        hooks.register('on_nothing', events.append)
+
+
+def test_init_takes_callbacks():
+    from cache_requests import Hooks
+
+    hooks = Hooks(on_hit=[len, repr], on_error=repr)
+
+    assert hooks.callbacks['on_hit'] == [len, repr]
+    assert hooks.callbacks['on_error'] == [repr]
+
+
+def test_failing_callback_is_logged(caplog):
+    from cache_requests import Hooks
+
+    def fail(_):
+        raise RuntimeError('boom')
+
+    events = []
+    hooks = Hooks(on_store=[fail, events.append])
+    hooks.emit('on_store', 'key', 'hello')
+
+    assert len(events) == 1
+    assert 'Hook on_store failed.' in caplog.text
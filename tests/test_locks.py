@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# coding=utf-8
+from threading import Event, Thread
+from time import sleep
+
+from pytest import fixture, raises
+
+from cache_requests.locks import DogpileLock, SingleFlight
+
+
+def run_threads(target, count):
+    """Start threads, return once every thread is about to call ``target``."""
+    entered = []
+
+    def run():
+        entered.append(1)
+        target()
+
+    threads = [Thread(target=run) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    while len(entered) < count:
+        sleep(0.001)
+    sleep(0.05)
+    return threads
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    release = Event()
+    calls, results = [], []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return 'results'
+
+    threads = run_threads(lambda: results.append(flight.do('key', compute)), 8)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ['results'] * 8
+    assert len(flight) == 0
+
+
+def test_single_flight_shares_errors():
+    flight = SingleFlight()
+    release = Event()
+    errors = []
+
+    def compute():
+        release.wait(5)
+        raise ValueError('boom')
+
+    def call():
+        try:
+            flight.do('key', compute)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = run_threads(call, 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 4
+    assert len(flight) == 0
+
+    # next call runs again
+    with raises(ValueError):
+        flight.do('key', compute)
+
+
+def test_single_flight_keys_are_independent():
+    flight = SingleFlight()
+
+    assert flight.do('a', lambda: 1) == 1
+    assert flight.do('b', lambda: 2) == 2
+
+
+@fixture
+def redis():
+    from cache_requests.utils import default_connection
+
+    return default_connection()
+
+
+def test_dogpile_lock_acquire_release(redis):
+    lock = DogpileLock(lease=5)
+
+    token = lock.acquire(redis, 'key')
+    assert token is not None
+    assert lock.acquire(redis, 'key') is None
+    assert 0 < redis.pttl(lock.lock_key('key')) <= 5000
+
+    # stale token can't release
+    assert lock.release(redis, 'key', 'not the token') == 0
+    assert lock.release(redis, 'key', token) == 1
+    assert lock.acquire(redis, 'key') is not None
+
+
+def test_dogpile_lock_rejects_unknown_policy():
+    with raises(ValueError):
+        DogpileLock(policy='panic')
+
+
+def test_dogpile_lock_computes_when_free(redis):
+    lock = DogpileLock()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return 'results'
+
+    assert lock.run(redis, 'key', compute, lambda: None) == 'results'
+    assert calls == [1]
+    assert not redis.exists(lock.lock_key('key'))
+
+
+def test_dogpile_lock_waits_for_holder(redis):
+    lock = DogpileLock(interval=0.01)
+    cache = {}
+
+    # another process holds the lock, stores results shortly
+    token = lock.acquire(redis, 'key')
+
+    def holder():
+        sleep(0.05)
+        cache['key'] = 'holder results'
+        lock.release(redis, 'key', token)
+
+    thread = Thread(target=holder)
+    thread.start()
+    results = lock.run(redis, 'key', lambda: 'waiter results', lambda: cache.get('key'))
+    thread.join()
+
+    assert results == 'holder results'
+
+
+def test_dogpile_lock_compute_policy_does_not_wait(redis):
+    lock = DogpileLock(policy=DogpileLock.COMPUTE)
+    lock.acquire(redis, 'key')
+
+    assert lock.run(redis, 'key', lambda: 'results', lambda: None) == 'results'
+
+
+def test_dogpile_lock_computes_after_timeout(redis):
+    lock = DogpileLock(timeout=0.05, interval=0.01)
+    lock.acquire(redis, 'key')
+
+    assert lock.run(redis, 'key', lambda: 'results', lambda: None) == 'results'
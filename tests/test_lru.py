@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# coding=utf-8
+from pytest import fixture, raises
+
+from cache_requests.lru import LRUCache
+
+
+@fixture
+def lru():
+    return LRUCache(maxsize=3, maxbytes=100)
+
+
+def test_get_set(lru):
+    """:type lru: LRUCache"""
+
+    assert lru.get('missing') is None
+    lru.set('key', 'value', size=10)
+    assert lru.get('key') == 'value'
+    assert lru['key'] == 'value'
+    assert 'key' in lru
+    assert len(lru) == 1
+    assert lru.currbytes == 10
+
+    with raises(KeyError):
+        _ = lru['missing']  # noqa
+
+
+def test_evicts_least_recently_used_by_count(lru):
+    """:type lru: LRUCache"""
+
+    lru.set('a', 1)
+    lru.set('b', 2)
+    lru.set('c', 3)
+
+    # touch `a`, `b` becomes least recently used
+    assert lru.get('a') == 1
+
+    lru.set('d', 4)
+    assert len(lru) == 3
+    assert 'b' not in lru
+    assert 'a' in lru and 'c' in lru and 'd' in lru
+
+
+def test_evicts_least_recently_used_by_bytes(lru):
+    """:type lru: LRUCache"""
+
+    lru.set('a', 1, size=40)
+    lru.set('b', 2, size=40)
+    lru.set('c', 3, size=40)
+
+    assert 'a' not in lru
+    assert lru.currbytes == 80
+
+    # never fits, not stored
+    lru.set('d', 4, size=101)
+    assert 'd' not in lru
+    assert lru.currbytes == 80
+
+
+def test_expiration(lru, monkeypatch):
+    """
+    :type lru: LRUCache
+    :type monkeypatch: _pytest.monkeypatch.monkeypatch
+    """
+
+    now = [1000.0]
+    monkeypatch.setattr('cache_requests.lru.monotonic', lambda: now[0])
+
+    lru.set('key', 'value', size=10, ex=5)
+    assert lru.get('key') == 'value'
+
+    now[0] += 5
+    assert lru.get('key') is None
+    assert lru.currbytes == 0
+
+
+def test_pop_and_clear(lru):
+    """:type lru: LRUCache"""
+
+    lru.set('a', 1, size=10)
+    lru.set('b', 2, size=10)
+
+    assert lru.pop('a') == 1
+    assert lru.pop('a') is None
+    assert lru.currbytes == 10
+
+    del lru['b']
+    lru.set('c', 3, size=10)
+    lru.clear()
+    assert len(lru) == 0
+    assert lru.currbytes == 0
@@ -9,7 +9,10 @@ Tests for ``cache_requests`` module.
 """
 
 from mock import MagicMock
-from pytest import fixture, raises
+from pytest import fixture, mark, raises
+from six import PY3
+
+from cache_requests.utils import deep_hash
 
 
 @fixture
@@ -72,11 +75,9 @@ def test_memoized_function_called_only_once_per_arguments(amazing_function):
 def test_expiration(amazing_function):
     """:type amazing_function: mock.MagicMock"""
 
-    from cache_requests.utils import deep_hash
-
     # SETUP
-    args, kwargs = ('amazing_function', 1, 2, 'three', 45), dict(this="is not", a="test")
-    key = deep_hash(*args, **kwargs)
+    args, kwargs = (1, 2, 'three', 45), dict(this="is not", a="test")
+    key = amazing_function.make_key(*args, **kwargs)
     assert amazing_function.redis.dbsize() == 0
 
     assert amazing_function(1, 2, 'three', 45, this="is not", a="test") == (4, 2)
@@ -162,9 +163,9 @@ def test_bust_cache_reevaluates_function(redis_mock):
     # ------------------------------------------------------------------------
     assert call_count() == (0, 0)
 
-    # 1 get, 1 set
+    # 1 generation get, 1 get, 1 set
     assert hello('hello', 'world') == 'sample text'
-    assert call_count() == (1, 1)
+    assert call_count() == (2, 1)
 
     assert call_count() == (0, 0)
 
@@ -240,9 +241,9 @@ def test_set_cache_cb_is_used_to_skip_cache(redis_mock):
     # ------------------------------------------------------------------------
     assert call_count() == (0, 0)
 
-    # 1 get, 1 set
+    # 1 generation get, 1 get, 1 set
     assert hello('hello', 'world') == 'sample text'
-    assert call_count() == (1, 1)
+    assert call_count() == (2, 1)
     assert call_count() == (0, 0)
 
     # TEST NO CACHE WHEN FALSE
@@ -279,3 +280,718 @@ def test_set_cache_cb_is_used_to_skip_cache(redis_mock):
     result['test'] = 'test: should still be using last results'
     assert hello(set_cache=sample_callback) == 'test: using results in callback'
     assert call_count() == (1, 0)
+
+
+def test_local_cache_skips_redis_on_hit(redis_mock):
+    """:type redis_mock: mock.MagicMock"""
+
+    from cache_requests import Memoize, LRUCache
+
+    # LOCAL TEST HELPER
+    # ------------------------------------------------------------------------
+    def call_count():
+        try:
+            return redis_mock.get.call_count, redis_mock.set.call_count
+        finally:
+            redis_mock.reset_mock()
+
+    # LOCAL SETUP
+    # ------------------------------------------------------------------------
+    local_cache = LRUCache()
+
+    @Memoize(connection=redis_mock, local_cache=local_cache)
+    def hello(*args):
+        return len(args)
+
+    # TEST WRITE THROUGH
+    # ------------------------------------------------------------------------
+
+    # 1 generation get, 1 get, 1 set
+    assert hello('hello', 'world') == 2
+    assert call_count() == (2, 1)
+    assert len(local_cache) == 1
+
+    # TEST LOCAL HIT
+    # ------------------------------------------------------------------------
+
+    # 0 gets, 0 sets
+    assert hello('hello', 'world') == 2
+    assert call_count() == (0, 0)
+
+    # TEST LOCAL MISS FILLS FROM REDIS
+    # ------------------------------------------------------------------------
+    local_cache.clear()
+
+    # 1 get, 0 sets
+    assert hello('hello', 'world') == 2
+    assert call_count() == (1, 0)
+
+    # 0 gets, 0 sets
+    assert hello('hello', 'world') == 2
+    assert call_count() == (0, 0)
+
+    # TEST BUST CACHE CLEARS LOCAL TIER
+    # ------------------------------------------------------------------------
+
+    # 0 gets, 1 set
+    assert hello('hello', 'world', bust_cache=True) == 2
+    assert call_count() == (0, 1)
+
+
+def test_local_cache_expires_with_redis():
+    from time import sleep
+
+    from cache_requests import Memoize, LRUCache
+
+    # LOCAL SETUP
+    # ------------------------------------------------------------------------
+    calls = []
+
+    def hello(name):
+        calls.append(name)
+        return 'hello %s' % name
+
+    writer = Memoize(hello, ex=60, namespace='shared')
+    reader = Memoize(hello, ex=60, namespace='shared', local_cache=LRUCache())
+
+    # TEST LOCAL COPY EXPIRES NO LATER THAN REDIS
+    # ------------------------------------------------------------------------
+    assert writer('world') == 'hello world'
+    key = writer.make_key('world')
+    writer.redis.pexpire(key, 200)  # stored by the writer, most of ``ex`` ago
+
+    assert reader('world') == 'hello world'
+    assert calls == ['world']
+    assert reader.local_cache.get(key) == 'hello world'
+
+    sleep(0.3)
+    assert reader.local_cache.get(key) is None
+    assert reader('world') == 'hello world'
+    assert calls == ['world', 'world']
+
+    # TEST BATCHES TOO
+    # ------------------------------------------------------------------------
+    reader.local_cache.clear()
+    writer.redis.pexpire(key, 200)
+
+    assert reader.many(['world']) == ['hello world']
+    assert calls == ['world', 'world']
+
+    sleep(0.3)
+    assert reader.local_cache.get(key) is None
+
+
+def test_single_flight_computes_once_for_concurrent_misses():
+    from threading import Event, Thread
+    from time import sleep
+
+    from cache_requests import Memoize
+
+    # LOCAL SETUP
+    # ------------------------------------------------------------------------
+    release = Event()
+    calls = []
+
+    @Memoize(single_flight=True)
+    def hello(*args):
+        calls.append(args)
+        release.wait(5)
+        return len(args)
+
+    results, entered = [], []
+
+    def call():
+        entered.append(1)
+        results.append(hello('hello', 'world'))
+
+    threads = [Thread(target=call) for _ in range(8)]
+
+    # TEST CONCURRENT MISSES
+    # ------------------------------------------------------------------------
+    for thread in threads:
+        thread.start()
+    while len(entered) < 8:
+        sleep(0.001)
+    sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == [2] * 8
+    assert len(calls) == 1
+
+
+def test_dogpile_lock_shares_results_across_instances():
+    from threading import Event, Thread, Timer
+
+    from cache_requests import Memoize, DogpileLock
+
+    # LOCAL SETUP
+    # ------------------------------------------------------------------------
+    release = Event()
+    calls = []
+
+    def hello(*args):
+        calls.append(args)
+        release.wait(5)
+        return len(args)
+
+    # same function, same db, separate instances.  Stand in for separate processes.
+    worker_1 = Memoize(hello, lock=DogpileLock(interval=0.01))
+    worker_2 = Memoize(hello, lock=DogpileLock(interval=0.01))
+
+    # TEST WAITER GETS HOLDER'S RESULTS
+    # ------------------------------------------------------------------------
+    results = []
+    thread = Thread(target=lambda: results.append(worker_1('hello', 'world')))
+    thread.start()
+    while not calls:
+        pass
+
+    Timer(0.1, release.set).start()
+    assert worker_2('hello', 'world') == 2
+    thread.join()
+
+    assert results == [2]
+    assert len(calls) == 1
+
+
+def test_stale_while_revalidate(monkeypatch):
+    """:type monkeypatch: _pytest.monkeypatch.monkeypatch"""
+
+    from cache_requests import Memoize
+
+    # LOCAL SETUP
+    # ------------------------------------------------------------------------
+    now = [1000.0]
+    monkeypatch.setattr('cache_requests.memoize.time', lambda: now[0])
+
+    result = {
+        'test': 'sample text'
+    }
+
+    @Memoize(ex=10, stale_ex=60)
+    def hello(*_):
+        return result.get('test')
+
+    # TEST HARD EXPIRATION COVERS STALE WINDOW
+    # ------------------------------------------------------------------------
+    assert hello('hello') == 'sample text'
+    key = hello.redis.keys()[0]
+    assert 69 < hello.redis.ttl(key) <= 70
+
+    # TEST FRESH RESULTS ARE SERVED FROM CACHE
+    # ------------------------------------------------------------------------
+    result['test'] = 'refreshed text'
+    assert hello('hello') == 'sample text'
+    assert len(hello.refresher) == 0
+
+    # TEST STALE RESULTS ARE SERVED, THEN REFRESHED
+    # ------------------------------------------------------------------------
+    now[0] += 10
+    assert hello('hello') == 'sample text'
+    hello.refresher.shutdown()
+
+    assert hello('hello') == 'refreshed text'
+
+
+def test_entry_expires_early_with_xfetch(monkeypatch):
+    """:type monkeypatch: _pytest.monkeypatch.monkeypatch"""
+
+    from cache_requests.memoize import Entry
+
+    # LOCAL SETUP
+    # ------------------------------------------------------------------------
+    monkeypatch.setattr('cache_requests.memoize.time', lambda: 1000.0)
+    rolls = [0.5]
+    monkeypatch.setattr('cache_requests.memoize.random', lambda: rolls[0])
+
+    # 10 seconds left, 2 seconds to compute
+    entry = Entry('results', 1010.0, 2.0)
+
+    # TEST WITHOUT XFETCH
+    # ------------------------------------------------------------------------
+    assert not Entry.wrap('results').is_stale(beta=1.0)
+    assert not entry.is_stale()
+    assert Entry('results', 1000.0, 2.0).is_stale()
+
+    # TEST PROBABILITY RISES WITH BETA AND UNLUCKY ROLLS
+    # ------------------------------------------------------------------------
+
+    # 2 * 1 * -log(0.5) ~= 1.4 seconds early
+    assert not entry.is_stale(beta=1.0)
+
+    # 2 * 10 * -log(0.5) ~= 13.9 seconds early
+    assert entry.is_stale(beta=10.0)
+
+    # 2 * 1 * -log(0.001) ~= 13.8 seconds early
+    rolls[0] = 0.999
+    assert entry.is_stale(beta=1.0)
+
+
+def test_xfetch_refreshes_before_expiration(monkeypatch):
+    """:type monkeypatch: _pytest.monkeypatch.monkeypatch"""
+
+    from cache_requests import Memoize
+
+    # LOCAL SETUP
+    # ------------------------------------------------------------------------
+    now = [1000.0]
+    monkeypatch.setattr('cache_requests.memoize.time', lambda: now[0])
+    monkeypatch.setattr('cache_requests.memoize.random', lambda: 0.999)
+
+    result = {
+        'test': 'sample text'
+    }
+
+    @Memoize(ex=60, xfetch_beta=1.0)
+    def hello(*_):
+        now[0] += 2  # 2 seconds to compute
+        return result.get('test')
+
+    assert hello('hello') == 'sample text'
+    result['test'] = 'refreshed text'
+
+    # TEST FAR FROM EXPIRATION
+    # ------------------------------------------------------------------------
+    assert hello('hello') == 'sample text'
+
+    # TEST NEAR EXPIRATION, REFRESHED EARLY
+    # ------------------------------------------------------------------------
+    now[0] += 50
+    assert hello('hello') == 'refreshed text'
+
+
+def test_ex_jitter_spreads_expiration(monkeypatch):
+    """:type monkeypatch: _pytest.monkeypatch.monkeypatch"""
+
+    from cache_requests import Memoize
+
+    monkeypatch.setattr('cache_requests.memoize.random', lambda: 0.5)
+
+    @Memoize(ex=100, ex_jitter=0.2)
+    def hello(*args):
+        return len(args)
+
+    assert hello('hello') == 1
+    key = hello.redis.keys()[0]
+
+    # 100 * (1 - 0.5 * 0.2)
+    assert 89000 < hello.redis.pttl(key) <= 90000
+
+    # TEST JITTER IS A FRACTION BELOW 1
+    # ------------------------------------------------------------------------
+    for ex_jitter in (-0.1, 1.0, 2):
+        with raises(ValueError):
+            Memoize(hello.func, ex_jitter=ex_jitter)
+
+    # TEST EXPIRATION ROUNDED TO 0 MS IS STORED FOR 1 MS
+    # ------------------------------------------------------------------------
+    tiny = Memoize(hello.func, ex=0.0004, namespace='tiny')
+    assert tiny('hello') == 1
+
+
+def test_many_gets_and_sets_in_one_round_trip(monkeypatch):
+    """:type monkeypatch: _pytest.monkeypatch.monkeypatch"""
+
+    from cache_requests import Memoize
+
+    # LOCAL SETUP
+    # ------------------------------------------------------------------------
+    calls = []
+
+    @Memoize
+    def hello(*args, **kwargs):
+        calls.append(args)
+        return sum(args) * kwargs.get('scale', 1)
+
+    round_trips = []
+
+    def count(command):
+        original = getattr(hello.redis, command)
+
+        def wrapper(*args, **kwargs):
+            round_trips.append(command)
+            return original(*args, **kwargs)
+
+        monkeypatch.setattr(hello.redis, command, wrapper)
+
+    for command in 'get', 'mget', 'set', 'pipeline':
+        count(command)
+
+    # TEST MISSES COMPUTED ONCE, IN INPUT ORDER
+    # ------------------------------------------------------------------------
+    assert hello(1) == 1
+    del round_trips[:], calls[:]
+
+    assert hello.many([1, (1, 2), 3, (1, 2)]) == [1, 3, 3, 3]
+    assert calls == [(1, 2), (3,)]
+    assert round_trips == ['mget', 'pipeline']
+
+    # TEST ALL HITS
+    # ------------------------------------------------------------------------
+    del round_trips[:], calls[:]
+    assert hello.many([(1, 2), 3, 1]) == [3, 3, 1]
+    assert calls == []
+    assert round_trips == ['mget']
+
+    # TEST SHARED KEYS WITH SINGLE CALLS
+    # ------------------------------------------------------------------------
+    assert hello(3) == 3
+    assert calls == []
+
+    # TEST KWARGS PASSED TO EVERY CALL
+    # ------------------------------------------------------------------------
+    assert hello.many([1, 3], scale=10) == [10, 30]
+    assert calls == [(1,), (3,)]
+
+    # TEST BUST CACHE
+    # ------------------------------------------------------------------------
+    del calls[:]
+    assert hello.many([1, 3], bust_cache=True) == [1, 3]
+    assert calls == [(1,), (3,)]
+
+    # TEST NO ARGUMENTS
+    # ------------------------------------------------------------------------
+    del round_trips[:], calls[:]
+    assert hello.many([]) == []
+    assert hello.many([], bust_cache=True) == []
+    assert hello.delete_many([]) == 0
+    assert calls == []
+
+
+@mark.parametrize('falsy', [0, '', [], False])
+def test_falsy_results_are_cached(falsy):
+    from cache_requests import Memoize
+
+    calls = []
+
+    @Memoize
+    def hello(*args):
+        calls.append(args)
+        return falsy
+
+    assert hello('hello') == falsy
+    assert hello('hello') == falsy
+    assert len(calls) == 1
+
+
+def test_negative_caching():
+    from cache_requests import Memoize, LRUCache
+
+    # LOCAL SETUP
+    # ------------------------------------------------------------------------
+    calls = []
+    results = {'hello': 'world'}
+
+    @Memoize(ex=60, negative_ex=5, local_cache=LRUCache())
+    def lookup(key):
+        calls.append(key)
+        return results.get(key)
+
+    # TEST NONE IS CACHED WITH NEGATIVE EXPIRATION
+    # ------------------------------------------------------------------------
+    assert lookup('missing') is None
+    assert lookup('missing') is None
+    assert calls == ['missing']
+
+    key = lookup.redis.keys()[0]
+    assert 4000 < lookup.redis.pttl(key) <= 5000
+
+    # TEST LOCAL TIER HOLDS NONE
+    # ------------------------------------------------------------------------
+    lookup.local_cache.clear()
+    assert lookup('missing') is None
+    assert lookup('missing') is None
+    assert calls == ['missing']
+
+    # TEST POSITIVE RESULTS USE EX
+    # ------------------------------------------------------------------------
+    assert lookup('hello') == 'world'
+    key = lookup.make_key('hello')
+    assert 59000 < lookup.redis.pttl(key) <= 60000
+
+
+def test_none_is_not_cached_by_default():
+    from cache_requests import Memoize
+
+    calls = []
+
+    @Memoize
+    def lookup(key):
+        calls.append(key)
+
+    assert lookup('missing') is None
+    assert lookup('missing') is None
+    assert calls == ['missing'] * 2
+
+
+def test_keys_are_namespaced():
+    from cache_requests import Memoize
+
+    # LOCAL SETUP
+    # ------------------------------------------------------------------------
+    def hello(*args):
+        return 'hello'
+
+    def world(*args):
+        return 'world'
+
+    world.__name__ = 'hello'
+
+    # TEST SAME NAME, DIFFERENT MODULE
+    # ------------------------------------------------------------------------
+    first = Memoize(hello, namespace='first')
+    second = Memoize(world, namespace='second')
+
+    assert first('args') == 'hello'
+    assert second('args') == 'world'
+    assert first.make_key('args').startswith('first:')
+
+    # TEST DEFAULT NAMESPACE IS MODULE QUALIFIED
+    # ------------------------------------------------------------------------
+    assert Memoize(hello).namespace == '%s.%s' % (__name__, hello.__qualname__ if PY3 else 'hello')
+
+    # TEST VERSION
+    # ------------------------------------------------------------------------
+    assert Memoize(world, namespace='first', version=2)('args') == 'world'
+    assert Memoize(world, namespace='first', version=2).make_key('args').startswith('first:v2:')
+
+
+def test_clear_bumps_generation():
+    from cache_requests import Memoize, LRUCache
+
+    # LOCAL SETUP
+    # ------------------------------------------------------------------------
+    calls = []
+
+    @Memoize(local_cache=LRUCache())
+    def hello(*args):
+        calls.append(args)
+        return len(calls)
+
+    other = Memoize(hello.func)
+    other.generation.ttl = 0
+
+    # TEST CLEAR INVALIDATES WITHOUT DELETING
+    # ------------------------------------------------------------------------
+    assert hello(1) == hello(1) == 1
+    assert hello(2) == 2
+    assert hello.redis.dbsize() == 2
+
+    assert hello.clear() == 1
+    assert hello.redis.dbsize() == 3
+
+    assert hello(1) == hello(1) == 3
+    assert calls == [(1,), (2,), (1,)]
+
+    # TEST OTHER INSTANCES SEE THE NEW GENERATION
+    # ------------------------------------------------------------------------
+    assert other(1) == 3
+    assert other.clear() == 2
+    assert other(1) == 4
+
+
+def test_invalidate_by_tag():
+    from cache_requests import Memoize, LRUCache
+
+    # LOCAL SETUP
+    # ------------------------------------------------------------------------
+    calls = []
+
+    @Memoize(local_cache=LRUCache())
+    def hello(*args):
+        calls.append(args)
+        return len(calls)
+
+    assert hello(1, cache_tags=['odd']) == 1
+    assert hello(2, cache_tags=['even']) == 2
+    assert hello.many([3, 5], cache_tags=['odd']) == [3, 4]
+
+    # TEST ONLY TAGGED ENTRIES ARE DELETED
+    # ------------------------------------------------------------------------
+    assert hello.invalidate('odd') == 3
+    assert hello.invalidate('odd') == 0
+
+    assert hello(2) == 2
+    assert hello(1) == 5
+    assert hello(5) == 6
+
+
+def test_stats():
+    from cache_requests import Memoize
+
+    # LOCAL SETUP
+    # ------------------------------------------------------------------------
+    @Memoize
+    def hello(*args):
+        return sum(args)
+
+    # TEST COUNTERS
+    # ------------------------------------------------------------------------
+    hello(1)
+    hello(1)
+    hello(2, set_cache=False)
+    hello(1, bust_cache=True)
+    hello.many([1, 3])
+
+    stats = hello.stats()
+    assert stats['hits'] == 2
+    assert stats['misses'] == 3
+    assert stats['stores'] == 3
+    assert stats['skipped_stores'] == 1
+    assert stats['busts'] == 1
+    assert stats['stored_bytes'] > 0
+    assert stats['hit_ratio'] == 0.4
+
+    # TEST LATENCIES
+    # ------------------------------------------------------------------------
+    assert stats['lookup']['count'] == 4
+    assert stats['compute']['count'] == 4
+    assert stats['store']['count'] == 3
+    assert stats['lookup']['p99'] > 0
+
+
+def test_hooks():
+    from cache_requests import Memoize, Hooks
+
+    # LOCAL SETUP
+    # ------------------------------------------------------------------------
+    events = []
+    hooks = Hooks()
+
+    @Memoize(hooks=hooks)
+    def hello(*args):
+        if not args:
+            raise ValueError('args required')
+        return sum(args)
+
+    def hook_names():
+        try:
+            return [event.hook for event in events]
+        finally:
+            del events[:]
+
+    # TEST NOTHING MEASURED WITHOUT CALLBACKS
+    # ------------------------------------------------------------------------
+    assert hello(1) == 1
+    assert hook_names() == []
+
+    for name in Hooks.names:
+        hooks.register(name, events.append)
+
+    # TEST MISS, STORE, HIT
+    # ------------------------------------------------------------------------
+    assert hello(2) == 2
+    miss, store = events
+    assert hook_names() == ['on_miss', 'on_store']
+    assert miss.name == 'hello' and miss.key == store.key
+    assert set(miss.timings) == {'hash', 'io'}
+    assert set(store.timings) == {'call', 'serialize', 'io'}
+
+    assert hello(2) == 2
+    hit, = events
+    assert hook_names() == ['on_hit']
+    assert set(hit.timings) == {'hash', 'io', 'deserialize'}
+
+    # TEST EVICT
+    # ------------------------------------------------------------------------
+    assert hello(2, bust_cache=True) == 2
+    assert hook_names() == ['on_evict', 'on_store']
+
+    # TEST ERROR
+    # ------------------------------------------------------------------------
+    with raises(ValueError):
+        hello()
+    error = events[-1]
+    assert hook_names() == ['on_miss', 'on_error']
+    assert isinstance(error.error, ValueError)
+
+    # TEST MANY
+    # ------------------------------------------------------------------------
+    assert hello.many([2, 3]) == [2, 3]
+    assert hook_names() == ['on_hit', 'on_miss', 'on_store']
+
+
+def test_keys_bind_arguments_to_signature():
+    from cache_requests import Memoize
+
+    # LOCAL SETUP
+    # ------------------------------------------------------------------------
+    calls = []
+
+    @Memoize
+    def search(query, page=1, *args, **kwargs):
+        calls.append(query)
+        return len(calls)
+
+    # TEST DEFAULTS AND KEYWORDS SHARE A KEY
+    # ------------------------------------------------------------------------
+    assert search('python') == 1
+    assert search('python', page=1) == 1
+    assert search(query='python', page=1) == 1
+    assert search('python', 1) == 1
+    assert search('python', 2) == 2
+    assert search('python', 1, 'extra') == 3
+    assert search('python', sort='asc') == 4
+    assert search(sort='asc', page=1, query='python') == 4
+
+    # TEST BAD ARGUMENTS RAISE FROM THE FUNCTION
+    # ------------------------------------------------------------------------
+    with raises(TypeError):
+        search(page=2)
+
+    # TEST SIGNATURES WITHOUT *ARGS OR **KWARGS
+    # ------------------------------------------------------------------------
+    @Memoize
+    def fetch(url, timeout=10, retries=3):
+        calls.append(url)
+        return len(calls)
+
+    assert fetch('a') == fetch('a', 10) == fetch('a', retries=3) == fetch(retries=3, url='a', timeout=10) == 5
+    assert fetch('a', retries=1) == 6
+    assert fetch.bind(('a',), {'retries': 1}) == (('a', 10, 1), {})
+
+    with raises(TypeError):
+        fetch('a', url='b')
+    with raises(TypeError):
+        fetch('a', unknown=1)
+
+
+def test_key_and_ignore():
+    from cache_requests import Memoize
+
+    # LOCAL SETUP
+    # ------------------------------------------------------------------------
+    calls = []
+
+    def fetch(url, timeout=10, retries=3):
+        calls.append(url)
+        return len(calls)
+
+    # TEST IGNORE
+    # ------------------------------------------------------------------------
+    ignored = Memoize(fetch, ignore=['timeout', 'retries'])
+    assert ignored('a') == ignored('a', 5) == ignored('a', timeout=1, retries=0) == 1
+    assert ignored('b', 5) == 2
+
+    with raises(ValueError):
+        Memoize(fetch, ignore=['missing'])
+
+    # TEST KEY
+    # ------------------------------------------------------------------------
+    keyed = Memoize(fetch, namespace='keyed', key=lambda url, **kwargs: url.lower())
+    assert keyed('URL') == keyed('url', timeout=1) == 3
+    assert keyed.make_key('url') == 'keyed:0:%s' % deep_hash('fetch', 'url')
+
+
+def test_builtin_subclass_arguments_get_distinct_keys():
+    from collections import OrderedDict
+    from cache_requests import Memoize
+
+    @Memoize(ex=60)
+    def first(mapping):
+        return mapping['a']
+
+    assert first(OrderedDict(a=1)) == 1
+    assert first(OrderedDict(a=2)) == 2
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# coding=utf-8
+from threading import Event
+
+from cache_requests.refresh import Refresher
+
+
+def test_refresher_runs_in_background():
+    refresher = Refresher()
+    done = Event()
+
+    assert refresher.submit('key', done.set)
+    assert done.wait(5)
+    refresher.shutdown()
+    assert len(refresher) == 0
+
+
+def test_refresher_dedupes_pending_keys():
+    refresher = Refresher()
+    release = Event()
+    calls = []
+
+    def refresh():
+        calls.append(1)
+        release.wait(5)
+
+    assert refresher.submit('key', refresh)
+    assert not refresher.submit('key', refresh)
+    assert refresher.submit('other key', refresh)
+
+    release.set()
+    refresher.shutdown()
+    assert len(calls) == 2
+    assert len(refresher) == 0
+
+    # key is free again
+    assert refresher.submit('key', refresh)
+    refresher.shutdown()
+    assert len(calls) == 3
+
+
+def test_refresher_swallows_errors():
+    refresher = Refresher()
+
+    def refresh():
+        raise ValueError('boom')
+
+    assert refresher.submit('key', refresh)
+    refresher.shutdown()
+    assert len(refresher) == 0
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# coding=utf-8
+import json
+import marshal
+from datetime import timedelta
+
+from pytest import fixture
+from requests import PreparedRequest, Response
+
+from cache_requests._compat import pickle
+from cache_requests.responses import LazyResponse, body_digest, dump_response, is_record, load_response
+
+
+def make_response(url, status_code=200, content=b'{"results": [1, 2, 3]}', history=()):
+    request = PreparedRequest()
+    request.prepare(method='GET', url=url, headers={'Accept': 'application/json'})
+
+    response = Response()
+    response.status_code = status_code
+    response.reason = 'OK' if status_code == 200 else 'Found'
+    response.url = url
+    response.headers['Content-Type'] = 'application/json'
+    response.headers['ETag'] = '"v1"'
+    response.encoding = 'utf-8'
+    response._content = content
+    response.elapsed = timedelta(seconds=0.25)
+    response.history = list(history)
+    response.request = request
+    return response
+
+
+@fixture
+def response():
+    redirect = make_response('http://example.com/old', 302, b'')
+    return make_response('http://example.com/new', history=[redirect])
+
+
+def test_round_trip(response):
+    loaded = load_response(dump_response(response))
+
+    assert isinstance(loaded, Response)
+    assert loaded.status_code == 200
+    assert loaded.reason == 'OK'
+    assert loaded.url == 'http://example.com/new'
+    assert loaded.headers['content-type'] == 'application/json'
+    assert list(loaded.headers) == ['Content-Type', 'ETag']
+    assert loaded.encoding == 'utf-8'
+    assert loaded.content == response.content
+    assert loaded.json() == {'results': [1, 2, 3]}
+    assert loaded.elapsed == timedelta(seconds=0.25)
+    assert loaded.request.method == 'GET'
+    assert loaded.request.url == 'http://example.com/new'
+    assert loaded.ok
+
+
+def test_history(response):
+    redirect, = load_response(dump_response(response)).history
+
+    assert redirect.status_code == 302
+    assert redirect.url == 'http://example.com/old'
+    assert redirect.content == b''
+
+
+def test_records_are_primitive(response):
+    record = dump_response(response)
+
+    assert is_record(record)
+    assert is_record(marshal.loads(marshal.dumps(record)))
+    assert is_record([list(field) if isinstance(field, tuple) else field for field in record])
+    assert load_response(marshal.loads(marshal.dumps(record))).content == response.content
+    assert not is_record(('cache_requests.response:2',))
+    assert not is_record(response)
+
+
+def test_records_of_text_serializers(response):
+    record = json.loads(json.dumps(dump_response(response, binary=False)))
+
+    assert is_record(record)
+    assert load_response(record).content == response.content
+    assert load_response(record).history[0].content == b''
+
+
+def test_records_are_smaller_than_pickles(response):
+    record = pickle.dumps(dump_response(response), pickle.HIGHEST_PROTOCOL)
+    assert len(record) < len(pickle.dumps(response, pickle.HIGHEST_PROTOCOL))
+
+
+def test_lazy_body(response):
+    calls = []
+
+    def load_body(digest):
+        calls.append(digest)
+        return response.content
+
+    record = dump_response(response, body_digest(response))
+    loaded = load_response(record, load_body)
+
+    assert record[6] is False
+    assert record[11] == body_digest(response)
+    assert isinstance(loaded, LazyResponse)
+    assert loaded.status_code == 200
+    assert loaded.headers['etag'] == '"v1"'
+    assert calls == []
+
+    assert loaded.json() == {'results': [1, 2, 3]}
+    assert b''.join(loaded.iter_content(4)) == response.content
+    assert pickle.loads(pickle.dumps(loaded)).content == response.content
+    assert calls == [body_digest(response)]
+
+
+def test_lazy_body_reload(response):
+    def load_body(digest):
+        raise LookupError(digest)
+
+    fresh = make_response('http://example.com/new', content=b'{"results": [4]}')
+    loaded = load_response(dump_response(response, body_digest(response)), load_body)
+    loaded.reload = lambda: fresh
+
+    assert loaded.json() == {'results': [4]}
+    assert loaded.history == []
+
+
+def test_lazy_memory_mapped_body(tmpdir, response):
+    import mmap
+
+    path = tmpdir.join('body')
+    path.write_binary(response.content)
+
+    def load_body(digest):
+        with open(str(path), 'rb') as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    loaded = load_response(dump_response(response, body_digest(response)), load_body)
+
+    body = loaded.body
+    assert isinstance(body, mmap.mmap)
+    assert b''.join(loaded.iter_content(4)) == response.content
+    assert loaded._content is False
+
+    # TEST CLOSE RELEASES THE MAP, MAPPED AGAIN ON ACCESS
+    # ------------------------------------------------------------------------
+    loaded.close()
+    assert body.closed
+    assert loaded.body is not body
+
+    # TEST CONTENT COPIES THE BODY AND CLOSES THE MAP
+    # ------------------------------------------------------------------------
+    body = loaded.body
+    assert loaded.content == response.content
+    assert body.closed
+    assert loaded.body is loaded.content
+    assert loaded.json() == {'results': [1, 2, 3]}
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# coding=utf-8
+from pytest import importorskip, mark, raises
+
+from cache_requests import serializers
+from cache_requests._compat import pickle
+from cache_requests.serializers import get_serializer
+
+sample_data = {
+    'text': 'this is a test',
+    'number': 42,
+    'float': 4.2,
+    'list': [1, 2, 'three'],
+    'nested': {'done': True, 'missing': None}
+}
+
+
+@mark.parametrize('name', ['pickle', 'marshal', 'json'])
+def test_round_trip(name):
+    serializer = get_serializer(name)
+
+    data = serializers.dumps(sample_data, serializer)
+    assert serializers.loads(data) == (sample_data, 0)
+
+
+def test_round_trip_msgpack():
+    importorskip('msgpack')
+
+    data = serializers.dumps(sample_data, get_serializer('msgpack'))
+    assert serializers.loads(data) == (sample_data, 0)
+
+
+def test_header():
+    serializer = get_serializer('json')
+    data = serializers.dumps([1, 2], serializer, flags=serializers.FLAG_ENTRY)
+
+    assert data[:3] == serializers.HEADER.pack(serializers.MAGIC, serializer.code, serializers.FLAG_ENTRY)
+    assert data[3:] == b'[1,2]'
+    assert serializers.loads(data) == ([1, 2], serializers.FLAG_ENTRY)
+
+
+def test_reads_headerless_pickles():
+    assert serializers.loads(pickle.dumps(sample_data)) == (sample_data, 0)
+
+
+def test_get_serializer():
+    assert isinstance(get_serializer(), serializers.PickleSerializer)
+    assert get_serializer().protocol == pickle.HIGHEST_PROTOCOL
+    assert isinstance(get_serializer('marshal'), serializers.MarshalSerializer)
+
+    with raises(ValueError):
+        get_serializer('yaml')
+
+
+def test_custom_serializer_is_registered():
+    class ReprSerializer(serializers.Serializer):
+        name = 'repr'
+        code = 99
+
+        def dumps(self, value):
+            return repr(value).encode('utf-8')
+
+        def loads(self, data):
+            return eval(data.decode('utf-8'))
+
+    serializer = get_serializer(ReprSerializer())
+    try:
+        assert serializers.loads(serializers.dumps((1, 'two'), serializer)) == ((1, 'two'), 0)
+    finally:
+        del serializers.serializers[ReprSerializer.code]
+
+
+def test_memoize_reads_values_across_serializers():
+    from cache_requests import Memoize
+
+    calls = []
+
+    def hello(*args):
+        calls.append(args)
+        return {'args': list(args)}
+
+    # stored as json, with stale-while-revalidate envelope
+    assert Memoize(hello, serializer='json', stale_ex=10)('hello', 'world') == {'args': ['hello', 'world']}
+
+    # read back by a marshal configured instance
+    assert Memoize(hello, serializer='marshal')('hello', 'world') == {'args': ['hello', 'world']}
+    assert len(calls) == 1
+
+
+def test_none_sentinel():
+    for name in 'pickle', 'marshal', 'json':
+        data = serializers.dumps(None, get_serializer(name))
+
+        assert len(data) == serializers.HEADER.size
+        assert serializers.loads(data) == (None, serializers.FLAG_NONE)
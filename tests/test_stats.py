@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# coding=utf-8
+from cache_requests.stats import Histogram, Stats
+
+
+def test_histogram_percentiles():
+    histogram = Histogram()
+    assert histogram.snapshot()['p50'] is None
+
+    for _ in range(98):
+        histogram.add(0.000003)
+    histogram.add(0.001)
+    histogram.add(2.0)
+
+    snapshot = histogram.snapshot()
+    assert snapshot['count'] == 100
+    assert snapshot['max'] == 2.0
+    assert snapshot['p50'] == 0.000004
+    assert snapshot['p99'] == 0.001024
+    assert histogram.percentile(100) == 2.0
+
+
+def test_histogram_open_ended_bucket():
+    histogram = Histogram()
+    histogram.add(1e9)
+
+    assert histogram.counts[-1] == 1
+    assert histogram.percentile(50) == 1e9
+
+
+def test_stats_snapshot_and_reset():
+    stats = Stats()
+    assert stats.snapshot()['hit_ratio'] is None
+
+    stats.incr('hits', 3)
+    stats.incr('misses')
+    stats.observe('lookup', 0.001)
+
+    snapshot = stats.snapshot()
+    assert snapshot['hits'] == 3
+    assert snapshot['hit_ratio'] == 0.75
+    assert snapshot['lookup']['count'] == 1
+
+    stats.reset()
+    assert stats.snapshot()['hits'] == 0
+    assert stats.snapshot()['lookup']['count'] == 0
@@ -1,10 +1,15 @@
 #!/usr/bin/env python
 # coding=utf-8
+from array import array
+from collections import Counter, OrderedDict, defaultdict, namedtuple
 from copy import deepcopy
+from decimal import Decimal
+from fractions import Fraction
+from struct import pack
 
-from pytest import fixture
+from pytest import fixture, importorskip
 
-from cache_requests.utils import deep_hash
+from cache_requests.utils import deep_hash, flat_digest, DataHasher, CHUNK_SIZE, new_digest
 
 
 def is_int(p_object):  # Test helper
@@ -85,3 +90,168 @@ def test_can_compare_args_and_kwargs():
 
 def test_can_compare_args_and_kwargs_2():
     assert deep_hash(1, 2, 'three', 45, this="test") != deep_hash(1, 2, 'three', 45, this="not", a="test")
+
+
+# TEST ENGINE
+# ----------------------------------------------------------------------------
+class Point(object):
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+    def norm(self):
+        return abs(self.x) + abs(self.y)
+
+
+class Coordinate(Point):
+    pass
+
+
+def test_deep_hash_is_unambiguous():
+    assert deep_hash('ab', 'c') != deep_hash('a', 'bc')
+    assert deep_hash([1, [2]]) != deep_hash([[1], 2])
+    assert deep_hash((1, 2)) != deep_hash([1, 2])
+    assert deep_hash(1) != deep_hash('1') != deep_hash(1.0)
+    assert deep_hash(True) != deep_hash(1)
+    assert deep_hash(None) != deep_hash('None')
+    assert deep_hash(b'data') != deep_hash(u'data')
+    assert deep_hash({'a': 1}) != deep_hash([('a', 1)])
+
+
+def test_deep_hash_sets_and_dicts_ignore_order():
+    assert deep_hash({3, 1, 2}) == deep_hash({2, 3, 1})
+    assert deep_hash({'a': 1, 'b': 2}) == deep_hash(dict([('b', 2), ('a', 1)]))
+    assert deep_hash({1, 'a', None}) == deep_hash({None, 'a', 1})
+    assert deep_hash({1: 'a', 'b': 2}) == deep_hash({'b': 2, 1: 'a'})
+
+
+def test_deep_hash_objects():
+    assert deep_hash(Point(1, 2)) == deep_hash(Point(1, 2))
+    assert deep_hash(Point(1, 2)) != deep_hash(Point(2, 1))
+    assert deep_hash(Point(1, 2)) != deep_hash(Coordinate(1, 2))
+    assert deep_hash(Point) != deep_hash(Coordinate)
+    assert deep_hash(Point.norm) == deep_hash(Point.norm)
+
+
+def test_deep_hash_deep_nesting():
+    obj = []
+    for _ in range(10000):
+        obj = [obj]
+
+    assert deep_hash(obj) == deep_hash(obj)
+
+
+def test_flat_digest_matches_engine():
+    args = ('get', 'http://localhost/search', 42, 1.5, True, None, b'data')
+    kwargs = {'q': 'python', 'page': 2, 'raw': b'', 'missing': None}
+
+    assert flat_digest(args, {}) == DataHasher().update(args).digest()
+    assert flat_digest(args, kwargs) == DataHasher().update((args, kwargs)).digest()
+    assert flat_digest((), {}) == DataHasher().update(()).digest()
+    assert deep_hash(*args, **kwargs) == DataHasher().update((args, kwargs)).digest()
+
+
+def test_flat_digest_skips_complex_arguments():
+    assert flat_digest(('get', [1, 2]), {}) is None
+    assert flat_digest(('get',), {'point': Point(1, 2)}) is None
+    assert deep_hash('get', [1, 2]) == DataHasher().update(('get', [1, 2])).digest()
+
+
+def test_deep_hash_buffers():
+    data = bytes(bytearray(range(256))) * 4
+
+    assert deep_hash(bytearray(data)) == deep_hash(bytearray(data))
+    assert deep_hash(bytearray(data)) != deep_hash(bytearray(data[:-1]) + b'x')
+    assert deep_hash(bytearray(data)) != deep_hash(data)
+    assert deep_hash(memoryview(data)) == deep_hash(memoryview(bytearray(data)))
+    assert deep_hash(memoryview(data)[::2]) == deep_hash(memoryview(data[::2]))
+    assert deep_hash(array('i', [1, 2, 3])) == deep_hash(array('i', [1, 2, 3]))
+    assert deep_hash(array('i', [1, 2, 3])) != deep_hash(array('I', [1, 2, 3]))
+
+
+def test_deep_hash_large_buffers_are_chunked():
+    data = b'x' * (2 * CHUNK_SIZE + 1)
+    expected = new_digest(b'b' + pack('>Q', len(data)) + data).hexdigest()
+
+    assert deep_hash(data) == expected
+    assert deep_hash('prefix', data) == DataHasher().update(('prefix', data)).digest()
+    assert deep_hash(bytearray(data)) != deep_hash(bytearray(data[:-1]) + b'y')
+
+
+def test_deep_hash_numpy_arrays():
+    numpy = importorskip('numpy')
+
+    matrix = numpy.arange(12, dtype='int64').reshape(3, 4)
+
+    assert deep_hash(matrix) == deep_hash(matrix.copy())
+    assert deep_hash(matrix) == deep_hash(numpy.asfortranarray(matrix))
+    assert deep_hash(matrix) != deep_hash(matrix.reshape(4, 3))
+    assert deep_hash(matrix) != deep_hash(matrix.astype('int32'))
+    assert deep_hash(matrix[:, ::2]) == deep_hash(matrix[:, ::2].copy())
+
+
+def test_deep_hash_numbers():
+    assert deep_hash('f', Decimal('9.99')) == deep_hash('f', Decimal('9.99'))
+    assert deep_hash('f', Decimal('9.99')) != deep_hash('f', Decimal('9.98'))
+    assert deep_hash('f', Decimal('9.99')) != deep_hash('f', '9.99')
+    assert deep_hash(Fraction(1, 3)) == deep_hash(Fraction(2, 6))
+    assert deep_hash(Fraction(1, 3)) != deep_hash(Fraction(1, 4))
+    assert deep_hash(Fraction(1, 2)) != deep_hash(Decimal('0.5'))
+    assert deep_hash(1 + 2j) != deep_hash(1 - 2j)
+
+
+def test_deep_hash_builtin_subclasses():
+    class Text(type('')):
+        pass
+
+    class Items(list):
+        pass
+
+    Pair = namedtuple('Pair', 'left right')
+
+    assert deep_hash(OrderedDict(a=1)) != deep_hash(OrderedDict(a=2))
+    assert deep_hash(OrderedDict(a=1)) != deep_hash({'a': 1})
+    assert deep_hash(defaultdict(list, a=[1])) != deep_hash(defaultdict(list, a=[2]))
+    assert deep_hash(Counter('ab')) != deep_hash(Counter('abb'))
+    assert deep_hash(Text('a')) != deep_hash(Text('b'))
+    assert deep_hash(Text('a')) != deep_hash('a')
+    assert deep_hash(Items([1])) != deep_hash(Items([2]))
+    assert deep_hash(Items([1])) == deep_hash(Items([1]))
+    assert deep_hash(Pair(1, 2)) != deep_hash(Pair(1, 3))
+
+    loop = Items([1])
+    loop.append(loop)
+    assert deep_hash(loop) == deep_hash(loop)
+
+
+def test_deep_hash_cycles():
+    loop = [1, 2]
+    loop.append(loop)
+    other = [1, 2]
+    other.append(other)
+
+    assert deep_hash(loop) == deep_hash(other)
+    assert deep_hash(loop) != deep_hash([1, 2, [1, 2]])
+
+    tree = {'name': 'root'}
+    tree['children'] = [{'name': 'leaf', 'parent': tree}]
+    assert deep_hash(tree) == deep_hash(tree)
+
+    first, second = Point(1, 2), Point(3, 4)
+    first.y, second.y = second, first
+    assert deep_hash(first) == deep_hash(first)
+    assert deep_hash(first) != deep_hash(second)
+
+
+def test_deep_hash_shared_objects_are_hashed_once():
+    graph = [0]
+    for _ in range(100):
+        graph = [graph, graph]
+
+    assert deep_hash(graph) == deep_hash(graph)
+
+    shared = [1]
+    assert deep_hash([shared, shared]) == deep_hash([shared, shared])
+    assert deep_hash([shared, shared]) == deep_hash([[1], [1]])
+    assert deep_hash({'a': shared, 'b': shared}) == deep_hash({'a': [1], 'b': [1]})
+    assert deep_hash([shared, shared], 'a') != deep_hash([shared, [2]], 'a')